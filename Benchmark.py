@@ -0,0 +1,313 @@
+import argparse
+import copy
+import glob
+import json
+import os
+import time
+import cv2
+import numpy as np
+import Server
+from Gestures import draw_hands
+from Server import FRAME_HEIGHT, FRAME_WIDTH, WIRE_FIELDS, load_objects_data
+
+SYNTHETIC_FRAMES = 600
+SYNTHETIC_CYCLE = 60
+SYNTHETIC_BACKGROUND = 96
+REPLAY_RATE = 30
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+HAND_TEMPLATE = np.array(
+    [
+        (0.0, 0.15),
+        (-0.04, 0.12),
+        (-0.07, 0.08),
+        (-0.09, 0.04),
+        (-0.1, 0.0),
+        (-0.03, 0.02),
+        (-0.035, -0.04),
+        (-0.04, -0.07),
+        (-0.045, -0.1),
+        (0.0, 0.015),
+        (0.0, -0.05),
+        (0.0, -0.085),
+        (0.0, -0.115),
+        (0.025, 0.02),
+        (0.03, -0.04),
+        (0.033, -0.07),
+        (0.035, -0.095),
+        (0.05, 0.035),
+        (0.06, -0.015),
+        (0.065, -0.04),
+        (0.07, -0.06),
+    ],
+    dtype=np.float32,
+)
+
+
+class ReplayCapture:
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.nominal_rate = rate or REPLAY_RATE
+        self.next_time = None
+        self.index = 0
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        pass
+
+    def next_frame(self):
+        return None
+
+    def read(self, image=None):
+        if self.interval:
+            now = time.perf_counter()
+            if self.next_time is None:
+                self.next_time = now
+            elif self.next_time > now:
+                time.sleep(self.next_time - now)
+            self.next_time += self.interval
+
+        frame = self.next_frame()
+        if frame is None:
+            return False, None
+        if frame.shape[:2] != (FRAME_HEIGHT, FRAME_WIDTH):
+            frame = cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT))
+        self.index += 1
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame.copy()
+
+
+class VideoReplay(ReplayCapture):
+    def __init__(self, path, rate=None):
+        super().__init__(rate)
+        self.cap = cv2.VideoCapture(path)
+        self.nominal_rate = rate or self.cap.get(cv2.CAP_PROP_FPS) or REPLAY_RATE
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+    def next_frame(self):
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+
+class ImageSequenceReplay(ReplayCapture):
+    def __init__(self, path, rate=None):
+        super().__init__(rate)
+        self.paths = sorted(
+            file
+            for file in glob.glob(os.path.join(path, "*"))
+            if file.lower().endswith(IMAGE_EXTENSIONS)
+        )
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def next_frame(self):
+        if self.index >= len(self.paths):
+            return None
+        return cv2.imread(self.paths[self.index])
+
+
+class SyntheticReplay(ReplayCapture):
+    def __init__(self, stream, rate=None):
+        super().__init__(rate)
+        self.stream = stream
+        self.frame = np.empty((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+
+    def next_frame(self):
+        if self.index >= len(self.stream):
+            return None
+
+        self.frame[:] = SYNTHETIC_BACKGROUND
+        hands = self.stream[self.index]
+        if len(hands):
+            mirrored = hands[:, :, :2] * (-1, 1) + (1, 0)
+            pixels = (mirrored * (FRAME_WIDTH, FRAME_HEIGHT)).astype(np.int32)
+            draw_hands(self.frame, pixels, (255, 255, 255))
+        stamp_frame_index(self.frame, self.index)
+        return self.frame
+
+
+class LandmarkModel:
+    def __init__(self, stream):
+        self.stream = stream
+        self.calls = 0
+
+    def __call__(self, rgb_frame):
+        self.calls += 1
+        return self.stream[read_frame_index(rgb_frame) % len(self.stream)].copy()
+
+
+def stamp_frame_index(frame, index):
+    for row, value in enumerate(index.to_bytes(4, "little")):
+        frame[row] = value
+
+
+def read_frame_index(frame):
+    return int.from_bytes(bytes(int(frame[row, 0, 0]) for row in range(4)), "little")
+
+
+def synthetic_hand(center_x, center_y, pinch):
+    hand = np.zeros((21, 3), dtype=np.float32)
+    hand[:, :2] = HAND_TEMPLATE + (center_x, center_y)
+    hand[4, :2] += (hand[8, :2] - hand[4, :2]) * pinch
+    return hand
+
+
+def synthetic_landmarks(frames=SYNTHETIC_FRAMES, cycle=SYNTHETIC_CYCLE):
+    stream = []
+    for frame in range(frames):
+        phase = frame % cycle / cycle
+        if phase < 0.25:
+            hand = synthetic_hand(0.6, 0.5, 0.0)
+        elif phase < 0.75:
+            drag = phase - 0.25
+            hand = synthetic_hand(0.6 - drag * 0.4, 0.5 - drag * 0.1, 1.0)
+        elif phase < 0.9:
+            hand = synthetic_hand(0.4 + (phase - 0.75) * 1.3, 0.45, 0.0)
+        else:
+            stream.append(np.empty((0, 21, 3), dtype=np.float32))
+            continue
+        stream.append(hand[np.newaxis])
+    return stream
+
+
+def load_landmark_stream(path):
+    with open(path, "r") as file:
+        frames = json.load(file)
+    return [np.array(hands, dtype=np.float32).reshape(-1, 21, 3) for hands in frames]
+
+
+def no_head_pose(rgb_frame):
+    return None
+
+
+def diff_objects(before, after):
+    before = {obj["uid"]: obj for obj in before}
+    after = {obj["uid"]: obj for obj in after}
+    changed = {}
+    for uid in before.keys() & after.keys():
+        fields = {
+            field: [before[uid].get(field), after[uid].get(field)]
+            for field in WIRE_FIELDS
+            if before[uid].get(field) != after[uid].get(field)
+        }
+        if fields:
+            changed[uid] = fields
+    return {
+        "added": sorted(after.keys() - before.keys()),
+        "removed": sorted(before.keys() - after.keys()),
+        "changed": changed,
+    }
+
+
+def run_benchmark(capture, models=None, detect_objects=True, keys="", max_frames=None):
+    for key in keys:
+        Server.apply_mode_key(key)
+
+    initial_objects = load_objects_data()
+    objects_data = copy.deepcopy(initial_objects)
+
+    start = time.perf_counter()
+    summary = Server.start_server(
+        headless=True,
+        profile=True,
+        capture=capture,
+        model_overrides=models,
+        detect_objects=detect_objects,
+        max_frames=max_frames,
+        drop_frames=bool(capture.interval),
+        objects_data=objects_data,
+        persist=False,
+        port=0,
+        serve=False,
+        clock=Server.FrameClock(None if capture.interval else capture.nominal_rate),
+    )
+    elapsed = time.perf_counter() - start
+    if summary is None:
+        return None
+
+    return {
+        "frames": summary["frames"],
+        "elapsed": elapsed,
+        "fps": summary["frames"] / elapsed if elapsed else 0.0,
+        "capture": summary["capture"],
+        "stages": summary["profile"]["stages"],
+        "scene_version": summary["scene_version"],
+        "mutations": diff_objects(initial_objects, summary["objects"]),
+    }
+
+
+def print_report(report):
+    print(
+        f"Frames processados: {report['frames']} em {report['elapsed']:.2f}s "
+        f"({report['fps']:.1f} fps), descartados: {report['capture']['dropped']}"
+    )
+    print(f"{'Etapa':<24}{'n':>8}{'média':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, stage in report["stages"].items():
+        print(
+            f"{name:<24}{stage['count']:>8}{stage['mean_ms']:>10.3f}"
+            f"{stage['p50_ms']:>10.3f}{stage['p95_ms']:>10.3f}{stage['p99_ms']:>10.3f}"
+        )
+    mutations = report["mutations"]
+    print(
+        f"Versões da cena: {report['scene_version']}, "
+        f"adicionados: {mutations['added']}, removidos: {mutations['removed']}, "
+        f"alterados: {sorted(mutations['changed'])}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--video")
+    source.add_argument("--images")
+    source.add_argument(
+        "--landmarks",
+        help="JSON com uma lista de frames, cada um uma lista de mãos 21x[x, y, z]",
+    )
+    source.add_argument("--synthetic", type=int, nargs="?", const=SYNTHETIC_FRAMES)
+    parser.add_argument("--rate", type=float, default=None)
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--keys", default="")
+    parser.add_argument("--no-detection", action="store_true")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    models = None
+    if args.video:
+        capture = VideoReplay(args.video, args.rate)
+    elif args.images:
+        capture = ImageSequenceReplay(args.images, args.rate)
+    else:
+        if args.landmarks:
+            stream = load_landmark_stream(args.landmarks)
+        else:
+            stream = synthetic_landmarks(args.synthetic)
+        capture = SyntheticReplay(stream, args.rate)
+        models = {"hands": LandmarkModel(stream), "head_pose": no_head_pose}
+
+    report = run_benchmark(
+        capture,
+        models=models,
+        detect_objects=not args.no_detection and models is None,
+        keys=args.keys,
+        max_frames=args.max_frames,
+    )
+    if report is None:
+        print("Não foi possível abrir a fonte de vídeo.")
+    else:
+        print_report(report)
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump(report, file, indent=2)
@@ -1,19 +1,142 @@
 import bpy
 import os
+import sys
+import argparse
 import math
 import socket
+import struct
 import json
 import threading
 import time
 
+MESSAGE_HEADER = struct.Struct("!I")
+BINARY_HEADER = struct.Struct("<BbIIHHH")
+BINARY_STRING = struct.Struct("<HBB")
+BINARY_TRANSFORM = struct.Struct("<H9f")
+BINARY_REMOVED = struct.Struct("<H")
+BINARY_SNAPSHOT = 1
+OBJECTS_PATH = os.environ.get(
+    "DESIGN3D_OBJECTS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "Objects"),
+)
+LIBRARY_NAME = "library.blend"
+LIBRARY_PATH = os.path.join(OBJECTS_PATH, LIBRARY_NAME)
+PROTECTED_OBJECTS = ("camera", "Wall_1", "Wall_2", "Wall_3", "wall_4")
+LIBRARY_PREFIX = "library:"
+CLIENT_MODE = "timer"
+POLL_INTERVAL = 0.02
+APPLY_BUDGET = 0.008
+RECEIVE_SIZE = 65536
+RECEIVE_LIMIT = 4 * 1024 * 1024
+RECONNECT_INTERVAL = 2.0
+
+
+class ModelLibrary:
+    def __init__(self):
+        self.models = {}
+        self.imports = 0
+        self.instances = 0
+
+    def preload(self, objects_path, library_path):
+        if not os.path.exists(library_path):
+            return 0
+
+        with bpy.data.libraries.load(library_path, link=True) as (data_from, data_to):
+            data_to.meshes = list(data_from.meshes)
+
+        for mesh in data_to.meshes:
+            if mesh is None:
+                continue
+            path = os.path.join(objects_path, mesh.name)
+            mtime = mesh.get("source_mtime")
+            if os.path.exists(path) and os.path.getmtime(path) != mtime:
+                continue
+            template = bpy.data.objects.new(LIBRARY_PREFIX + mesh.name, mesh)
+            template.use_fake_user = True
+            self.models[path] = (mtime, template)
+        return len(self.models)
+
+    def get(self, path):
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        entry = self.models.get(path)
+        if entry is not None and mtime in (None, entry[0]):
+            try:
+                entry[1].name
+                return entry[1]
+            except ReferenceError:
+                pass
+        if mtime is None:
+            return None
+
+        bpy.ops.object.select_all(action="DESELECT")
+        bpy.ops.wm.obj_import(filepath=path)
+        imported_objects = list(bpy.context.selected_objects)
+        if not imported_objects:
+            return None
+
+        template = imported_objects[0]
+        if len(imported_objects) > 1:
+            bpy.context.view_layer.objects.active = template
+            bpy.ops.object.join()
+            template = bpy.context.view_layer.objects.active
+
+        template.name = LIBRARY_PREFIX + os.path.basename(path)
+        template.data.use_fake_user = True
+        template.use_fake_user = True
+        for collection in list(template.users_collection):
+            collection.objects.unlink(template)
+
+        self.models[path] = (mtime, template)
+        self.imports += 1
+        return template
+
+    def instance(self, uid, path):
+        template = self.get(path)
+        if template is None:
+            return None
+
+        obj = template.copy()
+        obj.use_fake_user = False
+        obj.name = uid
+        bpy.context.scene.collection.objects.link(obj)
+        self.instances += 1
+        return obj
+
 
 class SocketClient:
-    def __init__(self, host, port):
+    def __init__(
+        self,
+        host,
+        port,
+        subscribe=True,
+        max_rate=None,
+        wire_format="binary",
+        objects_path=OBJECTS_PATH,
+    ):
         self.host = host
+        self.objects_path = objects_path
         self.port = port
+        self.subscribe = subscribe
+        self.max_rate = max_rate
+        self.wire_format = wire_format
         self.running = True
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.connected = False
+        self.subscribed = False
+        self.version = None
+        self.scene = {}
+        self.names = {}
+        self.lock = threading.Lock()
+        self.pending_changed = {}
+        self.pending_removed = set()
+        self.pending_snapshot = False
+        self.apply_scheduled = False
+        self.index = {}
+        self.applied = {}
+        self.library = ModelLibrary()
+        self.buffer = bytearray()
+        self.awaiting_reply = False
+        self.next_connect = 0.0
 
     def connect(self):
         try:
@@ -30,20 +153,37 @@ class SocketClient:
                 continue
 
             try:
-                request = {"action": "get_object"}
-                self.sock.sendall(json.dumps(request).encode("utf-8"))
-
-                data = self.sock.recv(4096)
+                if self.subscribe:
+                    if not self.subscribed:
+                        request = {
+                            "action": "subscribe",
+                            "version": self.version,
+                            "max_rate": self.max_rate,
+                            "format": self.wire_format,
+                        }
+                        self.send_message(json.dumps(request).encode("utf-8"))
+                        self.subscribed = True
+                else:
+                    request = {
+                        "action": "get_object",
+                        "version": self.version,
+                        "format": self.wire_format,
+                    }
+                    self.send_message(json.dumps(request).encode("utf-8"))
+
+                data = self.recv_message()
                 if not data:
                     break
 
-                message = data.decode("utf-8")
-
-                objects = json.loads(message)
-                if isinstance(objects, list):
-                    self.handle_message(objects)
+                if self.wire_format == "binary":
+                    update = self.decode_binary_update(data)
+                else:
+                    update = json.loads(data.decode("utf-8"))
+                if isinstance(update, dict):
+                    self.apply_update(update)
 
-                time.sleep(0.1)
+                if not self.subscribe:
+                    time.sleep(0.1)
 
             except Exception as e:
                 self.connected = False
@@ -51,167 +191,398 @@ class SocketClient:
     def reconnect(self):
         self.sock.close()
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.subscribed = False
+        self.version = None
+        self.scene = {}
+        self.names = {}
+        self.buffer = bytearray()
+        self.awaiting_reply = False
         self.connect()
 
-    def handle_message(self, objects):
-        uids = [obj_data.get("uid") for obj_data in objects]
-        for obj_data in objects:
-            uid = obj_data.get("uid")
+    def recv_exact(self, size):
+        buffer = bytearray()
+        while len(buffer) < size:
+            chunk = self.sock.recv(size - len(buffer))
+            if not chunk:
+                return None
+            buffer.extend(chunk)
+        return bytes(buffer)
+
+    def recv_message(self):
+        header = self.recv_exact(MESSAGE_HEADER.size)
+        if header is None:
+            return None
+        (length,) = MESSAGE_HEADER.unpack(header)
+        return self.recv_exact(length)
+
+    def send_message(self, payload):
+        self.sock.sendall(MESSAGE_HEADER.pack(len(payload)) + payload)
+
+    def decode_binary_update(self, data):
+        kind, side, version, base, string_count, transform_count, removed_count = (
+            BINARY_HEADER.unpack_from(data)
+        )
+        offset = BINARY_HEADER.size
+
+        for _ in range(string_count):
+            object_id, uid_length, model_length = BINARY_STRING.unpack_from(
+                data, offset
+            )
+            offset += BINARY_STRING.size
+            uid = data[offset : offset + uid_length].decode("utf-8")
+            offset += uid_length
+            model = data[offset : offset + model_length].decode("utf-8")
+            offset += model_length
+            self.names[object_id] = (uid, model)
+
+        changed = []
+        if side >= 0:
+            changed.append({"uid": "rotate", "side": side})
+
+        end = offset + transform_count * BINARY_TRANSFORM.size
+        for values in BINARY_TRANSFORM.iter_unpack(data[offset:end]):
+            uid, model = self.names[values[0]]
+            changed.append(
+                {
+                    "uid": uid,
+                    "model": model,
+                    "dimensions": list(values[1:4]),
+                    "location": list(values[4:7]),
+                    "rotation": list(values[7:10]),
+                }
+            )
+        offset = end
+
+        end = offset + removed_count * BINARY_REMOVED.size
+        removed = [
+            self.names[object_id][0]
+            for (object_id,) in BINARY_REMOVED.iter_unpack(data[offset:end])
+            if object_id in self.names
+        ]
+
+        if kind == BINARY_SNAPSHOT:
+            return {"type": "snapshot", "version": version, "objects": changed}
+        return {
+            "type": "delta",
+            "version": version,
+            "base": base,
+            "changed": changed,
+            "removed": removed,
+        }
+
+    def start_timer(self):
+        bpy.app.timers.register(self.poll, first_interval=0, persistent=True)
+
+    def poll(self):
+        if not self.running:
+            return None
+
+        if not self.connected:
+            now = time.monotonic()
+            if now >= self.next_connect:
+                self.next_connect = now + RECONNECT_INTERVAL
+                self.reconnect()
+                if self.connected:
+                    self.sock.setblocking(False)
+            return POLL_INTERVAL
 
-            if uid == "rotate":
-                side = obj_data.get("side", 0)
-                obj = bpy.data.objects.get("camera")
-
-                if side == 0:
-                    location = (0, -28.5, 3.65)
-                    rotation = (
-                        math.radians(4409.9),
-                        math.radians(-0.219),
-                        math.radians(359.54),
-                    )
-
-                    wall_1 = bpy.data.objects.get("Wall_1")
-                    wall_1.location = (7.7, 0.112159, 3.65)
-                    wall_1.scale = (0.250, 15, 7.5)
-                    wall_1.rotation_euler = (0, 0, 0)
-                    wall_2 = bpy.data.objects.get("Wall_2")
-                    wall_2.location = (-7.1947, 0.112159, 3.65)
-                    wall_2.scale = (0.250, 15, 7.5)
-                    wall_2.rotation_euler = (0, 0, 0)
-                    wall_3 = bpy.data.objects.get("Wall_3")
-                    wall_3.location = (0.30, 7.5, 3.65)
-                    wall_3.scale = (0.250, 15, 7.5)
-                    wall_3.rotation_euler = (0, 0, math.radians(90))
-
-                elif side == 2:
-                    location = (0, 28.787, 3.65)
-                    rotation = (
-                        math.radians(-4409.5),
-                        math.radians(-179.92),
-                        math.radians(360.74),
-                    )
-
-                    wall_1 = bpy.data.objects.get("Wall_1")
-                    wall_1.location = (7.7, 0.112159, 3.65)
-                    wall_1.scale = (0.250, 15, 7.5)
-                    wall_1.rotation_euler = (0, 0, 0)
-                    wall_2 = bpy.data.objects.get("Wall_2")
-                    wall_2.location = (-7.1947, 0.112159, 3.65)
-                    wall_2.scale = (0.250, 15, 7.5)
-                    wall_2.rotation_euler = (0, 0, 0)
-                    wall_3 = bpy.data.objects.get("Wall_3")
-                    wall_3.location = (0.30, -7.5, 3.65)
-                    wall_3.scale = (0.250, 15, 7.5)
-                    wall_3.rotation_euler = (0, 0, math.radians(90))
-
-                elif side == 1:
-                    location = (-28.582, 0, 3.65)
-                    rotation = (
-                        math.radians(4230.5),
-                        math.radians(539.74),
-                        math.radians(-269.58),
-                    )
-
-                    wall_1 = bpy.data.objects.get("Wall_1")
-                    wall_1.location = (0.30, 7.5, 3.65)
-                    wall_1.scale = (0.250, 15, 7.5)
-                    wall_1.rotation_euler = (0, 0, math.radians(90))
-                    wall_2 = bpy.data.objects.get("Wall_2")
-                    wall_2.location = (7.7, 0.112159, 3.65)
-                    wall_2.scale = (0.250, 15, 7.5)
-                    wall_2.rotation_euler = (0, 0, 0)
-                    wall_3 = bpy.data.objects.get("Wall_3")
-                    wall_3.location = (0.30, -7.5, 3.65)
-                    wall_3.scale = (0.250, 15, 7.5)
-                    wall_3.rotation_euler = (0, 0, math.radians(90))
-
-                elif side == 3:
-                    location = (29.257, 0, 3.65)
-                    rotation = (
-                        math.radians(-4230.1),
-                        math.radians(359.56),
-                        math.radians(-270.25),
-                    )
-
-                    wall_1 = bpy.data.objects.get("Wall_1")
-                    wall_1.location = (0.3, 7.5, 3.65)
-                    wall_1.scale = (0.250, 15, 7.5)
-                    wall_1.rotation_euler = (0, 0, math.radians(90))
-                    wall_2 = bpy.data.objects.get("Wall_2")
-                    wall_2.location = (0.3, -7.5, 3.65)
-                    wall_2.scale = (0.250, 15, 7.5)
-                    wall_2.rotation_euler = (0, 0, math.radians(90))
-                    wall_3 = bpy.data.objects.get("Wall_3")
-                    wall_3.location = (-7.1918, 0.112159, 3.65)
-                    wall_3.scale = (0.250, 15, 7.5)
-                    wall_3.rotation_euler = (0, 0, 0)
-                else:
-                    continue
+        try:
+            self.send_request()
+            received = 0
+            while received < RECEIVE_LIMIT:
+                chunk = self.sock.recv(RECEIVE_SIZE)
+                if not chunk:
+                    raise ConnectionError
+                self.buffer.extend(chunk)
+                received += len(chunk)
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self.connected = False
+            return POLL_INTERVAL
 
-                obj.location = location
-                obj.rotation_euler = rotation
+        try:
+            for data in self.read_messages():
+                if self.wire_format == "binary":
+                    update = self.decode_binary_update(data)
+                else:
+                    update = json.loads(data.decode("utf-8"))
+                if isinstance(update, dict):
+                    self.merge_update(update)
+                self.awaiting_reply = False
 
+            self.apply_pending(APPLY_BUDGET)
+        except Exception as e:
+            print(f"Erro ao aplicar a atualização da cena: {e}")
+            self.connected = False
+        return POLL_INTERVAL
+
+    def send_request(self):
+        if self.subscribe:
+            if self.subscribed:
+                return
+            request = {
+                "action": "subscribe",
+                "version": self.version,
+                "max_rate": self.max_rate,
+                "format": self.wire_format,
+            }
+            self.subscribed = True
+        else:
+            if self.awaiting_reply:
+                return
+            request = {
+                "action": "get_object",
+                "version": self.version,
+                "format": self.wire_format,
+            }
+            self.awaiting_reply = True
+        self.send_message(json.dumps(request).encode("utf-8"))
+
+    def read_messages(self):
+        messages = []
+        offset = 0
+        while len(self.buffer) - offset >= MESSAGE_HEADER.size:
+            (length,) = MESSAGE_HEADER.unpack_from(self.buffer, offset)
+            start = offset + MESSAGE_HEADER.size
+            if len(self.buffer) < start + length:
+                break
+            messages.append(bytes(self.buffer[start : start + length]))
+            offset = start + length
+        del self.buffer[:offset]
+        return messages
+
+    def apply_update(self, update):
+        self.merge_update(update)
+        with self.lock:
+            schedule = not self.apply_scheduled
+            self.apply_scheduled = True
+
+        if schedule:
+            bpy.app.timers.register(self.apply_pending)
+
+    def merge_update(self, update):
+        with self.lock:
+            if update.get("type") == "snapshot":
+                changed = update.get("objects", [])
+                scene = {obj.get("uid"): obj for obj in changed}
+                removed = [uid for uid in self.scene if uid not in scene]
+                self.scene = scene
+                self.pending_changed = {}
+                self.pending_snapshot = True
             else:
-                dimensions = obj_data.get("dimensions", {})
-                location = obj_data.get("location", {})
-                rotation = obj_data.get("rotation", {})
-                obj_file = (
-                    "C:/Users/joaossousa/Desktop/CompVisual/Design3DStudio/Objects/"
-                    + obj_data.get("model", "")
-                )
+                changed = update.get("changed", [])
+                removed = update.get("removed", [])
+                for uid in removed:
+                    self.scene.pop(uid, None)
+                for obj_data in changed:
+                    self.scene[obj_data.get("uid")] = obj_data
+
+            self.version = update.get("version")
+
+            for uid in removed:
+                self.pending_changed.pop(uid, None)
+                self.pending_removed.add(uid)
+            for obj_data in changed:
+                self.pending_removed.discard(obj_data.get("uid"))
+                self.pending_changed[obj_data.get("uid")] = obj_data
+
+    def apply_pending(self, budget=None):
+        with self.lock:
+            changed = self.pending_changed
+            removed = self.pending_removed
+            snapshot = self.pending_snapshot
+            uids = set(self.scene)
+            self.pending_changed = {}
+            self.pending_removed = set()
+            self.pending_snapshot = False
+            self.apply_scheduled = False
+
+        if not changed and not removed and not snapshot:
+            return None
+
+        deadline = None if budget is None else time.perf_counter() + budget
+        remaining = self.apply_changes(
+            list(changed.values()), removed, snapshot, uids, deadline
+        )
+        if remaining:
+            with self.lock:
+                for obj_data in remaining:
+                    uid = obj_data.get("uid")
+                    if uid not in self.pending_removed:
+                        self.pending_changed.setdefault(uid, obj_data)
+                if budget is None and not self.apply_scheduled:
+                    self.apply_scheduled = True
+                    bpy.app.timers.register(self.apply_pending)
+        return None
+
+    def apply_changes(self, changed, removed, snapshot, uids, deadline=None):
+        if snapshot:
+            removed = set(removed)
+            for obj in bpy.context.scene.objects:
+                if obj.name not in uids and obj.name not in PROTECTED_OBJECTS:
+                    removed.add(obj.name)
+
+        if removed:
+            self.remove_objects(removed)
+
+        for position, obj_data in enumerate(changed):
+            if position and deadline is not None and time.perf_counter() > deadline:
+                return changed[position:]
 
-                if not obj_file:
-                    continue
-
-                bpy.app.timers.register(
-                    lambda obj_uid=uid, obj_dimensions=dimensions, obj_location=location, obj_rotation=rotation, obj_file=obj_file, uids=uids: self.update_or_create_object(
-                        str(obj_uid),
-                        obj_dimensions,
-                        obj_location,
-                        obj_rotation,
-                        obj_file,
-                        uids,
-                    )
+            uid = obj_data.get("uid")
+            if uid == "rotate":
+                side = obj_data.get("side", 0)
+                if self.applied.get(uid) != side:
+                    self.set_room_side(side)
+                    self.applied[uid] = side
+            elif obj_data.get("model"):
+                self.update_or_create_object(
+                    str(uid),
+                    obj_data.get("dimensions"),
+                    obj_data.get("location"),
+                    obj_data.get("rotation"),
+                    os.path.join(self.objects_path, obj_data.get("model")),
                 )
+        return []
 
-    def update_or_create_object(
-        self, uid, dimensions, location, rotation, obj_file, uids
-    ):
-
-        all_objects = bpy.context.scene.objects
-        for obj in all_objects:
-            if obj.name not in uids and obj.name not in [
-                "camera",
-                "Wall_1",
-                "Wall_2",
-                "Wall_3",
-                "wall_4",
-            ]:
+    def lookup_object(self, uid):
+        obj = self.index.get(uid)
+        if obj is not None:
+            try:
+                if obj.name == uid:
+                    return obj
+            except ReferenceError:
+                pass
+
+        obj = bpy.data.objects.get(uid)
+        if obj is None:
+            self.index.pop(uid, None)
+            self.applied.pop(uid, None)
+        else:
+            self.index[uid] = obj
+        return obj
+
+    def remove_objects(self, uids):
+        for uid in uids:
+            obj = self.lookup_object(str(uid))
+            self.index.pop(uid, None)
+            self.applied.pop(uid, None)
+            if obj is not None:
                 bpy.data.objects.remove(obj)
-            elif obj.name == uid:
-                obj.location = (location[0], location[1], location[2])
-                obj.rotation_euler = (
-                    math.radians(rotation[0]),
-                    math.radians(rotation[1]),
-                    math.radians(rotation[2]),
-                )
-                obj.scale = (dimensions[0], dimensions[1], dimensions[2])
-
-        obj = bpy.data.objects.get(str(uid))
-        if obj is None and os.path.exists(obj_file):
-            bpy.ops.wm.obj_import(filepath=obj_file)
 
-            imported_objects = bpy.context.selected_objects
-            for imported_obj in imported_objects:
-                imported_obj.name = uid
-
-                imported_obj.location = (location[0], location[1], location[2])
-                imported_obj.rotation_euler = (
-                    math.radians(rotation[0]),
-                    math.radians(rotation[1]),
-                    math.radians(rotation[2]),
-                )
-                imported_obj.scale = (dimensions[0], dimensions[1], dimensions[2])
+    def set_room_side(self, side):
+        obj = bpy.data.objects.get("camera")
+
+        if side == 0:
+            location = (0, -28.5, 3.65)
+            rotation = (
+                math.radians(4409.9),
+                math.radians(-0.219),
+                math.radians(359.54),
+            )
+
+            wall_1 = bpy.data.objects.get("Wall_1")
+            wall_1.location = (7.7, 0.112159, 3.65)
+            wall_1.scale = (0.250, 15, 7.5)
+            wall_1.rotation_euler = (0, 0, 0)
+            wall_2 = bpy.data.objects.get("Wall_2")
+            wall_2.location = (-7.1947, 0.112159, 3.65)
+            wall_2.scale = (0.250, 15, 7.5)
+            wall_2.rotation_euler = (0, 0, 0)
+            wall_3 = bpy.data.objects.get("Wall_3")
+            wall_3.location = (0.30, 7.5, 3.65)
+            wall_3.scale = (0.250, 15, 7.5)
+            wall_3.rotation_euler = (0, 0, math.radians(90))
+
+        elif side == 2:
+            location = (0, 28.787, 3.65)
+            rotation = (
+                math.radians(-4409.5),
+                math.radians(-179.92),
+                math.radians(360.74),
+            )
+
+            wall_1 = bpy.data.objects.get("Wall_1")
+            wall_1.location = (7.7, 0.112159, 3.65)
+            wall_1.scale = (0.250, 15, 7.5)
+            wall_1.rotation_euler = (0, 0, 0)
+            wall_2 = bpy.data.objects.get("Wall_2")
+            wall_2.location = (-7.1947, 0.112159, 3.65)
+            wall_2.scale = (0.250, 15, 7.5)
+            wall_2.rotation_euler = (0, 0, 0)
+            wall_3 = bpy.data.objects.get("Wall_3")
+            wall_3.location = (0.30, -7.5, 3.65)
+            wall_3.scale = (0.250, 15, 7.5)
+            wall_3.rotation_euler = (0, 0, math.radians(90))
+
+        elif side == 1:
+            location = (-28.582, 0, 3.65)
+            rotation = (
+                math.radians(4230.5),
+                math.radians(539.74),
+                math.radians(-269.58),
+            )
+
+            wall_1 = bpy.data.objects.get("Wall_1")
+            wall_1.location = (0.30, 7.5, 3.65)
+            wall_1.scale = (0.250, 15, 7.5)
+            wall_1.rotation_euler = (0, 0, math.radians(90))
+            wall_2 = bpy.data.objects.get("Wall_2")
+            wall_2.location = (7.7, 0.112159, 3.65)
+            wall_2.scale = (0.250, 15, 7.5)
+            wall_2.rotation_euler = (0, 0, 0)
+            wall_3 = bpy.data.objects.get("Wall_3")
+            wall_3.location = (0.30, -7.5, 3.65)
+            wall_3.scale = (0.250, 15, 7.5)
+            wall_3.rotation_euler = (0, 0, math.radians(90))
+
+        elif side == 3:
+            location = (29.257, 0, 3.65)
+            rotation = (
+                math.radians(-4230.1),
+                math.radians(359.56),
+                math.radians(-270.25),
+            )
+
+            wall_1 = bpy.data.objects.get("Wall_1")
+            wall_1.location = (0.3, 7.5, 3.65)
+            wall_1.scale = (0.250, 15, 7.5)
+            wall_1.rotation_euler = (0, 0, math.radians(90))
+            wall_2 = bpy.data.objects.get("Wall_2")
+            wall_2.location = (0.3, -7.5, 3.65)
+            wall_2.scale = (0.250, 15, 7.5)
+            wall_2.rotation_euler = (0, 0, math.radians(90))
+            wall_3 = bpy.data.objects.get("Wall_3")
+            wall_3.location = (-7.1918, 0.112159, 3.65)
+            wall_3.scale = (0.250, 15, 7.5)
+            wall_3.rotation_euler = (0, 0, 0)
+        else:
+            return
+
+        obj.location = location
+        obj.rotation_euler = rotation
+
+    def update_or_create_object(self, uid, dimensions, location, rotation, obj_file):
+        transform = (tuple(dimensions), tuple(location), tuple(rotation))
+        obj = self.lookup_object(uid)
+        if obj is None:
+            obj = self.library.instance(uid, obj_file)
+            if obj is None:
+                return None
+            self.index[uid] = obj
+        elif self.applied.get(uid) == transform:
+            return obj
+
+        obj.location = (location[0], location[1], location[2])
+        obj.rotation_euler = (
+            math.radians(rotation[0]),
+            math.radians(rotation[1]),
+            math.radians(rotation[2]),
+        )
+        obj.scale = (dimensions[0], dimensions[1], dimensions[2])
+        self.applied[uid] = transform
+        return obj
 
     def stop(self):
         self.running = False
@@ -259,15 +630,49 @@ class ModalSocketOperator(bpy.types.Operator):
     def execute(self, context):
         self.create_room()
 
-        self.client = SocketClient("127.0.0.1", 65432)
-        self.client.connect()
+        self.client = SocketClient("127.0.0.1", 65432, objects_path=OBJECTS_PATH)
+        self.client.library.preload(OBJECTS_PATH, LIBRARY_PATH)
 
-        threading.Thread(target=self.client.listen_and_request, daemon=True).start()
+        if CLIENT_MODE == "timer":
+            self.client.start_timer()
+        else:
+            self.client.connect()
+            threading.Thread(target=self.client.listen_and_request, daemon=True).start()
 
         context.window_manager.modal_handler_add(self)
         return {"RUNNING_MODAL"}
 
 
+def build_asset_library(objects_path, library_path):
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+
+    models = sorted(
+        file for file in os.listdir(objects_path) if file.lower().endswith(".obj")
+    )
+    for model in models:
+        path = os.path.join(objects_path, model)
+        bpy.ops.object.select_all(action="DESELECT")
+        bpy.ops.wm.obj_import(filepath=path)
+        imported_objects = list(bpy.context.selected_objects)
+        if not imported_objects:
+            print(f"Erro ao importar o modelo {path}")
+            continue
+
+        bpy.context.view_layer.objects.active = imported_objects[0]
+        if len(imported_objects) > 1:
+            bpy.ops.object.join()
+
+        mesh = bpy.context.view_layer.objects.active.data
+        mesh.name = model
+        mesh["source_mtime"] = os.path.getmtime(path)
+        mesh.use_fake_user = True
+        bpy.ops.object.delete()
+        print(f"Modelo convertido: {model}")
+
+    bpy.ops.wm.save_as_mainfile(filepath=os.path.abspath(library_path))
+    print(f"Biblioteca guardada em {library_path}")
+
+
 def register():
     bpy.utils.register_class(ModalSocketOperator)
 
@@ -277,5 +682,21 @@ def unregister():
 
 
 if __name__ == "__main__":
-    register()
-    bpy.ops.wm.modal_socket_operator("INVOKE_DEFAULT")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--build-assets", action="store_true")
+    parser.add_argument("--assets-root", default=OBJECTS_PATH)
+    parser.add_argument("--library")
+    parser.add_argument(
+        "--client-mode", choices=("timer", "thread"), default=CLIENT_MODE
+    )
+    argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else []
+    args = parser.parse_args(argv)
+    OBJECTS_PATH = args.assets_root
+    LIBRARY_PATH = args.library or os.path.join(OBJECTS_PATH, LIBRARY_NAME)
+    CLIENT_MODE = args.client_mode
+
+    if args.build_assets:
+        build_asset_library(OBJECTS_PATH, LIBRARY_PATH)
+    else:
+        register()
+        bpy.ops.wm.modal_socket_operator("INVOKE_DEFAULT")
@@ -0,0 +1,54 @@
+import threading
+import tracemalloc
+import numpy as np
+
+
+class FrameBuffers:
+    def __init__(self, trace=False):
+        self.lock = threading.Lock()
+        self.buffers = {}
+        self.allocations = 0
+        self.allocated_bytes = 0
+        self.frames = 0
+        self.frame_start_allocations = 0
+        self.frame_allocations = 0
+        self.trace = trace
+        self.frame_base = 0
+        self.frame_peak = 0
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def get(self, name, shape, dtype=np.uint8):
+        buffer = self.buffers.get(name)
+        if buffer is not None and buffer.shape == shape and buffer.dtype == dtype:
+            return buffer
+
+        with self.lock:
+            buffer = np.empty(shape, dtype=dtype)
+            self.buffers[name] = buffer
+            self.allocations += 1
+            self.allocated_bytes += buffer.nbytes
+        return buffer
+
+    def start_frame(self):
+        self.frame_start_allocations = self.allocations
+        if self.trace:
+            tracemalloc.reset_peak()
+            self.frame_base = tracemalloc.get_traced_memory()[0]
+
+    def end_frame(self):
+        self.frames += 1
+        self.frame_allocations = self.allocations - self.frame_start_allocations
+        if self.trace:
+            self.frame_peak = tracemalloc.get_traced_memory()[1] - self.frame_base
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "buffers": len(self.buffers),
+                "allocations": self.allocations,
+                "allocated_bytes": self.allocated_bytes,
+                "frames": self.frames,
+                "last_frame_allocations": self.frame_allocations,
+                "last_frame_peak_bytes": self.frame_peak if self.trace else None,
+            }
@@ -0,0 +1,191 @@
+import cv2
+import numpy as np
+from Buffers import FrameBuffers
+
+WRIST = 0
+THUMB_CMC = 1
+THUMB_TIP = 4
+INDEX_PIP, INDEX_TIP = 6, 8
+MIDDLE_PIP, MIDDLE_TIP = 10, 12
+RING_PIP, RING_TIP = 14, 16
+PINKY_PIP, PINKY_TIP = 18, 20
+FINGER_TIPS = [INDEX_TIP, MIDDLE_TIP, RING_TIP, PINKY_TIP]
+FINGER_PIPS = [INDEX_PIP, MIDDLE_PIP, RING_PIP, PINKY_PIP]
+HAND_CHAINS = [
+    np.array(chain)
+    for chain in (
+        [0, 1, 2, 3, 4],
+        [0, 5, 6, 7, 8],
+        [9, 10, 11, 12],
+        [13, 14, 15, 16],
+        [0, 17, 18, 19, 20],
+        [5, 9, 13, 17],
+    )
+]
+PINCH_DISTANCE = 50
+SWIPE_DISTANCE = 0.25
+ROI_MARGIN = 0.25
+ROI_MIN_SIZE = 0.25
+ROI_REFRESH_FRAMES = 15
+ROI_INPUT_SIZE = 256
+
+
+def landmarks_to_array(multi_hand_landmarks):
+    if not multi_hand_landmarks:
+        return np.empty((0, 21, 3), dtype=np.float32)
+    return np.array(
+        [
+            [(landmark.x, landmark.y, landmark.z) for landmark in hand.landmark]
+            for hand in multi_hand_landmarks
+        ],
+        dtype=np.float32,
+    )
+
+
+def classify_hands(hands, frame_width, frame_height):
+    pixels = (hands[:, :, :2] * (frame_width, frame_height)).astype(np.int32)
+    pinch_distance = np.linalg.norm(
+        (pixels[:, THUMB_TIP] - pixels[:, INDEX_TIP]).astype(np.float32), axis=1
+    )
+
+    tips_y = hands[:, FINGER_TIPS, 1]
+    pips_y = hands[:, FINGER_PIPS, 1]
+    extended = tips_y < pips_y
+    folded = tips_y > pips_y
+
+    wrist_x = hands[:, WRIST, 0]
+    thumb_x = hands[:, THUMB_CMC, 0]
+    left = wrist_x < thumb_x
+    right = wrist_x > thumb_x
+
+    return {
+        "pixels": pixels,
+        "pinch_distance": pinch_distance,
+        "extended": extended,
+        "scissors": extended[:, 0] & extended[:, 1] & folded[:, 2] & folded[:, 3],
+        "left": left,
+        "right": right,
+        "pinching": right & (pinch_distance < PINCH_DISTANCE),
+        "released": right & (pinch_distance > PINCH_DISTANCE),
+        "wrist_x": wrist_x,
+        "thumb": hands[:, THUMB_CMC, :2],
+        "thumb_tip_x": pixels[:, THUMB_TIP, 0],
+    }
+
+
+class HandTracker:
+    def __init__(
+        self,
+        hands,
+        inference_size,
+        roi=True,
+        roi_margin=ROI_MARGIN,
+        roi_min_size=ROI_MIN_SIZE,
+        refresh_frames=ROI_REFRESH_FRAMES,
+        roi_input_size=ROI_INPUT_SIZE,
+        buffers=None,
+    ):
+        self.hands = hands
+        self.buffers = buffers or FrameBuffers()
+        self.inference_size = inference_size
+        self.roi = roi
+        self.roi_margin = roi_margin
+        self.roi_min_size = roi_min_size
+        self.refresh_frames = refresh_frames
+        self.roi_input_size = min(roi_input_size, *inference_size)
+        self.box = None
+        self.roi_frames = 0
+        self.roi_hits = 0
+        self.full_searches = 0
+
+    def process(self, rgb_frame):
+        if self.roi and self.box is not None and self.roi_frames < self.refresh_frames:
+            hands = self.run(rgb_frame, self.box)
+            if len(hands):
+                self.roi_hits += 1
+                self.roi_frames += 1
+                self.box = self.track(hands, rgb_frame.shape)
+                return hands
+
+        hands = self.run(rgb_frame, None)
+        self.full_searches += 1
+        self.roi_frames = 0
+        self.box = self.track(hands, rgb_frame.shape) if len(hands) else None
+        return hands
+
+    def track(self, hands, shape):
+        frame_height, frame_width = shape[:2]
+        points = hands[:, :, :2].reshape(-1, 2) * (frame_width, frame_height)
+        (x0, y0), (x1, y1) = points.min(axis=0), points.max(axis=0)
+        side = max(x1 - x0, y1 - y0) * (1 + 2 * self.roi_margin)
+        side = max(side, self.roi_min_size * max(frame_width, frame_height))
+        side = int(min(side, frame_width, frame_height))
+        left = int(min(max((x0 + x1 - side) / 2, 0), frame_width - side))
+        top = int(min(max((y0 + y1 - side) / 2, 0), frame_height - side))
+        return left, top, left + side, top + side
+
+    def run(self, rgb_frame, box):
+        frame_height, frame_width = rgb_frame.shape[:2]
+        x0, y0, x1, y1 = box or (0, 0, frame_width, frame_height)
+        image = rgb_frame[y0:y1, x0:x1]
+
+        crop_width, crop_height = x1 - x0, y1 - y0
+        if box is not None:
+            side = self.roi_input_size
+            resized = self.buffers.get("hands_roi", (side, side, 3))
+            cv2.resize(image, (side, side), dst=resized, interpolation=cv2.INTER_AREA)
+            image = resized
+        else:
+            scale = min(
+                self.inference_size[0] / crop_width,
+                self.inference_size[1] / crop_height,
+            )
+            if scale < 1:
+                size = (int(crop_width * scale), int(crop_height * scale))
+                resized = self.buffers.get("hands_input", (size[1], size[0], 3))
+                cv2.resize(image, size, dst=resized, interpolation=cv2.INTER_AREA)
+                image = resized
+
+        hands = landmarks_to_array(self.hands.process(image).multi_hand_landmarks)
+        hands[:, :, 0] = (x0 + hands[:, :, 0] * crop_width) / frame_width
+        hands[:, :, 1] = (y0 + hands[:, :, 1] * crop_height) / frame_height
+        return hands
+
+
+class SwipeTracker:
+    def __init__(self, threshold=SWIPE_DISTANCE):
+        self.threshold = threshold
+        self.left_origin = None
+        self.right_origin = None
+
+    def reset(self):
+        self.left_origin = None
+        self.right_origin = None
+
+    def update(self, wrist_x, left, right, can_next, can_previous):
+        if left:
+            if not can_next:
+                return 0
+            if self.left_origin is None:
+                self.left_origin = wrist_x
+            elif wrist_x - self.left_origin > self.threshold:
+                self.left_origin = wrist_x
+                return 1
+        elif right and can_previous:
+            if self.right_origin is None:
+                self.right_origin = wrist_x
+            elif self.right_origin - wrist_x > self.threshold:
+                self.right_origin = wrist_x
+                return -1
+        return 0
+
+
+def draw_hands(image, pixels, color=(0, 0, 255)):
+    if not len(pixels):
+        return image
+
+    bones = [hand[chain] for hand in pixels for chain in HAND_CHAINS]
+    cv2.polylines(image, bones, False, color, 2)
+    points = np.repeat(pixels.reshape(-1, 1, 2), 2, axis=1)
+    cv2.polylines(image, list(points), False, color, 10)
+    return image
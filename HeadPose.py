@@ -0,0 +1,156 @@
+import math
+import cv2
+import mediapipe as mp
+from Buffers import FrameBuffers
+
+LEFT_CHEEK, RIGHT_CHEEK, NOSE_TIP, FOREHEAD, CHIN = 234, 454, 1, 10, 152
+RIGHT_EAR_TRAGION, LEFT_EAR_TRAGION, DETECTION_NOSE_TIP = 4, 5, 2
+TILT_ENTER_ANGLE = 15.0
+TILT_EXIT_ANGLE = 10.0
+ROI_MARGIN = 0.5
+ROI_SIZE = 192
+
+
+def roll_angle(left, right, frame_width, frame_height):
+    dx = (right[0] - left[0]) * frame_width
+    dy = (left[1] - right[1]) * frame_height
+    return math.degrees(math.atan2(dy, abs(dx)))
+
+
+def yaw_angle(left, right, nose):
+    half_width = (right[0] - left[0]) / 2
+    if half_width == 0:
+        return 0.0
+    offset = (nose[0] - (left[0] + right[0]) / 2) / abs(half_width)
+    return math.degrees(math.asin(max(-1.0, min(1.0, offset))))
+
+
+class HeadTiltEstimator:
+    def __init__(self, enter_angle=TILT_ENTER_ANGLE, exit_angle=TILT_EXIT_ANGLE):
+        self.enter_angle = enter_angle
+        self.exit_angle = exit_angle
+        self.tilted = False
+
+    def update(self, roll):
+        if not self.tilted:
+            if roll > self.enter_angle:
+                self.tilted = True
+                return 1
+            if roll < -self.enter_angle:
+                self.tilted = True
+                return -1
+        elif abs(roll) < self.exit_angle:
+            self.tilted = False
+        return 0
+
+
+class HeadPoseEstimator:
+    def __init__(
+        self,
+        model="face_mesh",
+        roi=False,
+        roi_margin=ROI_MARGIN,
+        roi_size=ROI_SIZE,
+        yaw=False,
+        enter_angle=TILT_ENTER_ANGLE,
+        exit_angle=TILT_EXIT_ANGLE,
+        buffers=None,
+    ):
+        self.model = model
+        self.buffers = buffers or FrameBuffers()
+        self.roi = roi
+        self.roi_margin = roi_margin
+        self.roi_size = roi_size
+        self.yaw = yaw
+        self.tilt = HeadTiltEstimator(enter_angle, exit_angle)
+        self.box = None
+
+        if model == "face_detection":
+            self.detector = mp.solutions.face_detection.FaceDetection(
+                model_selection=0, min_detection_confidence=0.5
+            )
+        else:
+            self.detector = mp.solutions.face_mesh.FaceMesh(
+                min_detection_confidence=0.5, min_tracking_confidence=0.5
+            )
+
+    def crop(self, rgb_frame):
+        frame_height, frame_width = rgb_frame.shape[:2]
+        if not self.roi or self.box is None:
+            return rgb_frame, (0, 0, frame_width, frame_height)
+
+        x0, y0, x1, y1 = self.box
+        side = max((x1 - x0) * frame_width, (y1 - y0) * frame_height)
+        side = int(min(side * (1 + 2 * self.roi_margin), frame_width, frame_height))
+        if side < 2:
+            return rgb_frame, (0, 0, frame_width, frame_height)
+
+        left = (x0 + x1) * frame_width / 2 - side / 2
+        top = (y0 + y1) * frame_height / 2 - side / 2
+        left = int(min(max(left, 0), frame_width - side))
+        top = int(min(max(top, 0), frame_height - side))
+
+        crop = rgb_frame[top : top + side, left : left + side]
+        image = self.buffers.get("head_pose_roi", (self.roi_size, self.roi_size, 3))
+        cv2.resize(
+            crop,
+            (self.roi_size, self.roi_size),
+            dst=image,
+            interpolation=cv2.INTER_AREA,
+        )
+        return image, (left, top, side, side)
+
+    def find_points(self, image):
+        if self.model == "face_detection":
+            results = self.detector.process(image)
+            if not results.detections:
+                return None
+            location = results.detections[0].location_data
+            keypoints = location.relative_keypoints
+            box = location.relative_bounding_box
+            points = [
+                keypoints[index]
+                for index in (RIGHT_EAR_TRAGION, LEFT_EAR_TRAGION, DETECTION_NOSE_TIP)
+            ]
+            corners = [
+                (box.xmin, box.ymin),
+                (box.xmin + box.width, box.ymin + box.height),
+            ]
+        else:
+            results = self.detector.process(image)
+            if not results.multi_face_landmarks:
+                return None
+            landmarks = results.multi_face_landmarks[0].landmark
+            points = [landmarks[index] for index in (LEFT_CHEEK, RIGHT_CHEEK, NOSE_TIP)]
+            corners = [
+                (landmark.x, landmark.y)
+                for landmark in points + [landmarks[FOREHEAD], landmarks[CHIN]]
+            ]
+        return [(point.x, point.y) for point in points], corners
+
+    def process(self, rgb_frame):
+        frame_height, frame_width = rgb_frame.shape[:2]
+        image, (left, top, width, height) = self.crop(rgb_frame)
+        found = self.find_points(image)
+        if found is None:
+            self.box = None
+            return None
+
+        points, corners = found
+        left_point, right_point, nose = [
+            ((left + x * width) / frame_width, (top + y * height) / frame_height)
+            for x, y in points
+        ]
+        xs = [(left + x * width) / frame_width for x, _ in corners]
+        ys = [(top + y * height) / frame_height for _, y in corners]
+        self.box = (min(xs), min(ys), max(xs), max(ys))
+
+        roll = roll_angle(left_point, right_point, frame_width, frame_height)
+        return {
+            "roll": roll,
+            "yaw": yaw_angle(left_point, right_point, nose) if self.yaw else None,
+            "step": self.tilt.update(roll),
+        }
+
+    def close(self):
+        self.detector.close()
@@ -0,0 +1,169 @@
+import json
+import os
+import queue
+import threading
+import time
+
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_FLUSH_INTERVAL = 0.5
+JOURNAL_COMPACT_RECORDS = 5000
+
+
+def apply_record(state, record):
+    if record["op"] == "put":
+        state[record["obj"]["uid"]] = record["obj"]
+    elif record["op"] == "del":
+        state.pop(record["uid"], None)
+
+
+def replay_journal(objects, journal_path):
+    if not os.path.exists(journal_path):
+        return objects
+
+    state = {obj["uid"]: obj for obj in objects}
+    with open(journal_path, "r") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            apply_record(state, record)
+    return list(state.values())
+
+
+def write_snapshot(path, objects):
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "w") as file:
+        json.dump(objects, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+class SceneJournal:
+    def __init__(
+        self,
+        path,
+        objects,
+        flush_interval=JOURNAL_FLUSH_INTERVAL,
+        compact_records=JOURNAL_COMPACT_RECORDS,
+    ):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.flush_interval = flush_interval
+        self.compact_records = compact_records
+        self.state = {obj["uid"]: obj for obj in objects}
+        self.records = queue.SimpleQueue()
+        self.file = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.journal_records = 0
+        self.written = 0
+        self.coalesced = 0
+        self.fsyncs = 0
+        self.compactions = 0
+
+    def start(self):
+        self.file = open(self.journal_path, "a")
+        if self.file.tell():
+            self.write_compaction()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def on_change(self, op, uid, obj):
+        if op == "put":
+            self.records.put({"op": "put", "obj": obj})
+        else:
+            self.records.put({"op": "del", "uid": uid})
+
+    def compact(self):
+        self.records.put({"op": "compact"})
+
+    def close(self):
+        self.records.put(None)
+        self.thread.join()
+
+    def next_batch(self):
+        batch = [self.records.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while batch[-1] is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.records.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        running = True
+        while running:
+            batch = self.next_batch()
+            running = batch[-1] is not None
+            compact = not running
+
+            pending = {}
+            for record in batch:
+                if record is None:
+                    continue
+                if record["op"] == "compact":
+                    compact = True
+                    continue
+                uid = record["uid"] if record["op"] == "del" else record["obj"]["uid"]
+                pending[uid] = record
+            records = [
+                record for record in pending.values() if not self.is_current(record)
+            ]
+
+            try:
+                if records:
+                    self.write_records(records)
+                    with self.lock:
+                        self.coalesced += len(batch) - len(records)
+                if compact or self.journal_records >= self.compact_records:
+                    self.write_compaction()
+            except Exception as e:
+                print(f"Erro ao salvar o ficheiro {self.path}: {e}")
+
+        self.file.close()
+
+    def is_current(self, record):
+        if record["op"] == "put":
+            return self.state.get(record["obj"]["uid"]) == record["obj"]
+        return record["uid"] not in self.state
+
+    def write_records(self, records):
+        self.file.write(
+            "".join(
+                json.dumps(record, separators=(",", ":")) + "\n" for record in records
+            )
+        )
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        for record in records:
+            apply_record(self.state, record)
+        with self.lock:
+            self.journal_records += len(records)
+            self.written += len(records)
+            self.fsyncs += 1
+
+    def write_compaction(self):
+        write_snapshot(self.path, list(self.state.values()))
+        self.file.truncate(0)
+        self.file.seek(0)
+        os.fsync(self.file.fileno())
+        with self.lock:
+            self.journal_records = 0
+            self.compactions += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "journal_records": self.journal_records,
+                "written": self.written,
+                "coalesced": self.coalesced,
+                "fsyncs": self.fsyncs,
+                "compactions": self.compactions,
+            }
@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+
+PROFILE_WINDOW = 300
+PROFILE_PERCENTILES = (50, 95, 99)
+PROFILE_DUMP_INTERVAL = 5.0
+
+
+class StageProfiler:
+    def __init__(
+        self,
+        enabled=False,
+        window=PROFILE_WINDOW,
+        dump_path=None,
+        dump_interval=PROFILE_DUMP_INTERVAL,
+    ):
+        self.enabled = enabled
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.frame_times = deque(maxlen=window)
+        self.frames = 0
+        self.last_lap = 0.0
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.last_dump = time.monotonic()
+
+    def record(self, name, elapsed):
+        if not self.enabled:
+            return
+        samples = self.samples.get(name)
+        if samples is None:
+            with self.lock:
+                samples = self.samples.setdefault(name, deque(maxlen=self.window))
+        samples.append(elapsed)
+
+    def start_frame(self):
+        if self.enabled:
+            self.last_lap = time.perf_counter()
+
+    def lap(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.record(name, now - self.last_lap)
+        self.last_lap = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        self.frame_times.append(now)
+        self.frames += 1
+        if self.dump_path and now - self.last_dump >= self.dump_interval:
+            self.last_dump = now
+            self.dump(self.dump_path)
+
+    def fps(self):
+        frame_times = list(self.frame_times)
+        if len(frame_times) < 2 or frame_times[-1] == frame_times[0]:
+            return 0.0
+        return (len(frame_times) - 1) / (frame_times[-1] - frame_times[0])
+
+    def snapshot(self):
+        with self.lock:
+            stages = {name: list(samples) for name, samples in self.samples.items()}
+
+        report = {}
+        for name, values in stages.items():
+            if not values:
+                continue
+            milliseconds = np.array(values) * 1000
+            percentiles = np.percentile(milliseconds, PROFILE_PERCENTILES)
+            report[name] = {
+                "count": len(values),
+                "mean_ms": float(milliseconds.mean()),
+                **{
+                    f"p{percentile}_ms": float(value)
+                    for percentile, value in zip(PROFILE_PERCENTILES, percentiles)
+                },
+            }
+        return {
+            "enabled": self.enabled,
+            "frames": self.frames,
+            "fps": self.fps(),
+            "stages": report,
+        }
+
+    def dump(self, path):
+        snapshot = self.snapshot()
+        if path.endswith(".prom"):
+            lines = [
+                "# TYPE design3d_fps gauge",
+                f"design3d_fps {snapshot['fps']:.3f}",
+                "# TYPE design3d_stage_seconds summary",
+            ]
+            for name, stage in snapshot["stages"].items():
+                for percentile in PROFILE_PERCENTILES:
+                    quantile = percentile / 100
+                    value = stage[f"p{percentile}_ms"] / 1000
+                    labels = f'stage="{name}",quantile="{quantile}"'
+                    lines.append(f"design3d_stage_seconds{{{labels}}} {value:.6f}")
+                lines.append(
+                    f'design3d_stage_seconds_count{{stage="{name}"}} {stage["count"]}'
+                )
+            content = "\n".join(lines) + "\n"
+        else:
+            columns = ["stage", "count", "mean_ms"] + [
+                f"p{percentile}_ms" for percentile in PROFILE_PERCENTILES
+            ]
+            lines = [",".join(columns)]
+            for name, stage in snapshot["stages"].items():
+                lines.append(
+                    ",".join(
+                        [name, str(stage["count"])]
+                        + [f"{stage[column]:.3f}" for column in columns[2:]]
+                    )
+                )
+            lines.append(f"fps,{snapshot['frames']},{snapshot['fps']:.3f},,,")
+            content = "\n".join(lines) + "\n"
+
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "w") as file:
+            file.write(content)
+        os.replace(temporary_path, path)
@@ -0,0 +1,136 @@
+import threading
+
+FIXED_UIDS = ("floor", "rotate")
+
+
+def copy_object(obj):
+    return {
+        key: list(value) if isinstance(value, list) else value
+        for key, value in obj.items()
+    }
+
+
+def split_uid(uid):
+    prefix, _, index = uid.rpartition("_")
+    if prefix and index.isdigit():
+        return prefix, int(index)
+    return uid, None
+
+
+class SceneStore:
+    def __init__(self, objects=()):
+        self.lock = threading.Lock()
+        self.objects = {}
+        self.counters = {}
+        self.locations = {}
+        self.version = 0
+        self.changed = set()
+        self.removed = set()
+        self.furniture_cache = None
+        self.listeners = []
+        for obj in objects:
+            self.put(obj)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __contains__(self, uid):
+        return uid in self.objects
+
+    def get(self, uid):
+        return self.objects.get(uid)
+
+    def next_uid(self, prefix):
+        return f"{prefix}_{self.counters.get(prefix, 0) + 1}"
+
+    def has_location(self, location):
+        return tuple(location) in self.locations
+
+    def index_location(self, obj, delta):
+        if obj["uid"] in FIXED_UIDS or "location" not in obj:
+            return
+        key = tuple(obj["location"])
+        count = self.locations.get(key, 0) + delta
+        if count:
+            self.locations[key] = count
+        else:
+            self.locations.pop(key, None)
+
+    def put(self, obj):
+        obj = copy_object(obj)
+        uid = obj["uid"]
+        with self.lock:
+            previous = self.objects.get(uid)
+            if previous == obj:
+                return previous
+            if previous is not None:
+                self.index_location(previous, -1)
+            else:
+                self.furniture_cache = None
+            self.objects[uid] = obj
+            self.index_location(obj, 1)
+
+            prefix, index = split_uid(uid)
+            if index is not None and index > self.counters.get(prefix, 0):
+                self.counters[prefix] = index
+
+            self.version += 1
+            self.changed.add(uid)
+            self.removed.discard(uid)
+
+        for listener in self.listeners:
+            listener("put", uid, obj)
+        return obj
+
+    def create(self, prefix, **fields):
+        return self.put({"uid": self.next_uid(prefix), **fields})
+
+    def update(self, uid, **fields):
+        return self.put({**self.objects[uid], **fields})
+
+    def set_component(self, uid, field, index, value):
+        values = list(self.objects[uid][field])
+        values[index] = value
+        return self.update(uid, **{field: values})
+
+    def remove(self, uid):
+        with self.lock:
+            obj = self.objects.pop(uid, None)
+            if obj is None:
+                return None
+            self.index_location(obj, -1)
+            self.furniture_cache = None
+            self.version += 1
+            self.removed.add(uid)
+            self.changed.discard(uid)
+
+        for listener in self.listeners:
+            listener("del", uid, None)
+        return obj
+
+    def furniture(self):
+        furniture = self.furniture_cache
+        if furniture is None:
+            with self.lock:
+                furniture = [uid for uid in self.objects if uid not in FIXED_UIDS]
+                self.furniture_cache = furniture
+        return furniture
+
+    def selected(self, index):
+        furniture = self.furniture()
+        if 0 <= index < len(furniture):
+            return self.objects[furniture[index]]
+        return None
+
+    def snapshot(self):
+        with self.lock:
+            return self.version, tuple(self.objects.values())
+
+    def drain_changes(self):
+        with self.lock:
+            changed, removed = self.changed, self.removed
+            self.changed, self.removed = set(), set()
+            return self.version, changed, removed
+
+    def to_list(self):
+        return [copy_object(obj) for obj in self.snapshot()[1]]
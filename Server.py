@@ -1,6 +1,13 @@
-from math import sqrt
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import copy
+import queue
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import time
 import socket
+import struct
 import json
 import threading
 import os
@@ -9,14 +16,65 @@ import numpy as np
 import mediapipe as mp
 from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
+from Gestures import HandTracker, SwipeTracker, classify_hands, draw_hands
+from HeadPose import HeadPoseEstimator
+from Buffers import FrameBuffers
+from Profiler import StageProfiler
+from Scene import SceneStore
+from Journal import JOURNAL_SUFFIX, SceneJournal, replay_journal
 
 FILE_PATH = "data.json"
 FRAME_WIDTH, FRAME_HEIGHT = 640, 480
+INFERENCE_WIDTH, INFERENCE_HEIGHT = 640, 480
+HAND_ROI = True
+ALLOCATION_TRACE = False
+PROFILE_STAGES = False
+PROFILE_DUMP_PATH = None
+HEADLESS = False
+PREVIEW_PORT = None
+PREVIEW_FPS = 10
+PREVIEW_QUALITY = 70
+AXES = {"x": 0, "y": 1, "z": 2}
+COMMANDS = ("x", "y", "z", "c", "s", "r", "d", "e", "save", "quit")
 MODEL_PATH = "assets/models/efficientdet_lite16.tflite"
 COCO_NAMES_PATH = "assets/coco.names"
+MESSAGE_HEADER = struct.Struct("!I")
+SCENE_HISTORY_SIZE = 64
+SUBSCRIBE_HEARTBEAT = 5.0
+WIRE_FIELDS = ("uid", "dimensions", "location", "rotation", "model", "side")
+BINARY_HEADER = struct.Struct("<BbIIHHH")
+BINARY_STRING = struct.Struct("<HBB")
+BINARY_TRANSFORM = struct.Struct("<H9f")
+BINARY_REMOVED = struct.Struct("<H")
+BINARY_SNAPSHOT, BINARY_DELTA = 1, 2
+NO_BASE = 0xFFFFFFFF
+CAPTURE_SLOTS = 3
+CAPTURE_SOURCE = 0
+PIN_INFERENCE_MODELS = True
+DETECTION_INTERVAL = 3.0
+DETECTION_MIN_INTERVAL = 1.0
+DETECTION_MAX_INTERVAL = 10.0
+IMAGES_PATH = "assets/images"
+PREVIEW_SIZE = (150, 150)
+SPRITE_CHECK_INTERVAL = 1.0
+HEAD_POSE_MODEL = "face_mesh"
+HEAD_POSE_ROI = False
+HAND_TRACKING_FPS = 30
+MODEL_SCHEDULE = {
+    "hands": {"budget": 0.025, "priority": 0},
+    "head_pose": {"rate": 15, "budget": 0.015, "priority": 1},
+    "detector": {"rate": 1, "budget": 0.1, "priority": 2},
+}
+MIN_DECIMATION = 0.5
+MAX_DECIMATION = 16
+SCHEDULE_IDLE_RATIO = 0.6
+SCHEDULE_RATE_WINDOW = 2.0
+MOTION_SIZE = (80, 60)
+MOTION_PIXEL_THRESHOLD = 15
+MOTION_AREA_THRESHOLD = 0.01
+MOTION_IDLE_DELAY = 2.0
+MOTION_IDLE_INTERVAL = 1.0
 selected_object_index = 0
-old_l_wrist_x = None
-old_r_wrist_x = None
 selected_axis = None
 side = 0
 scale = False
@@ -39,143 +97,998 @@ allowed_classes = [cls for cls in coco_classes if cls not in excluded_classes]
 
 
 def load_objects_data():
+    objects_data = []
     if os.path.exists(FILE_PATH):
         try:
             with open(FILE_PATH, "r") as file:
-                return json.load(file)
+                objects_data = json.load(file)
         except Exception as e:
             print(f"Erro ao carregar o ficheiro {FILE_PATH}: {e}")
-            return []
-    return []
-
-
-def save_objects_data(data):
     try:
-        with open(FILE_PATH, "w") as file:
-            json.dump(data, file)
+        return replay_journal(objects_data, FILE_PATH + JOURNAL_SUFFIX)
     except Exception as e:
-        print(f"Erro ao salvar o ficheiro {FILE_PATH}: {e}")
+        print(f"Erro ao carregar o ficheiro {FILE_PATH + JOURNAL_SUFFIX}: {e}")
+        return objects_data
+
+
+def apply_mode_key(key):
+    global selected_axis, scale, rotate, delete
+    if key == "x":
+        selected_axis = "x"
+    elif key == "y":
+        selected_axis = "y"
+    elif key == "z":
+        selected_axis = "z"
+    elif key == "c":
+        selected_axis = None
+    elif key == "s":
+        scale = not scale
+        rotate = False
+        delete = False
+    elif key == "r":
+        rotate = not rotate
+        scale = False
+        delete = False
+    elif key == "d":
+        rotate = False
+        scale = False
+        delete = not delete
+    elif key == "e":
+        scale = False
+        rotate = False
+        delete = False
+        selected_axis = None
+
+
+async def read_message(reader):
+    try:
+        header = await reader.readexactly(MESSAGE_HEADER.size)
+        (length,) = MESSAGE_HEADER.unpack(header)
+        return await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        return None
+
+
+def frame_message(payload):
+    return MESSAGE_HEADER.pack(len(payload)) + payload
+
+
+async def write_frame(writer, frame):
+    writer.write(frame)
+    await writer.drain()
+
+
+async def write_message(writer, payload):
+    await write_frame(writer, frame_message(payload))
+
+
+def to_wire_object(obj):
+    return {key: copy.deepcopy(obj[key]) for key in WIRE_FIELDS if key in obj}
+
+
+class SceneHistory:
+    def __init__(self, history_size=SCENE_HISTORY_SIZE, profiler=None):
+        self.lock = threading.Lock()
+        self.profiler = profiler
+        self.version = 0
+        self.layout_version = 0
+        self.objects = {}
+        self.deltas = deque(maxlen=history_size)
+        self.object_ids = {}
+        self.listeners = []
+        self.cache_lock = threading.Lock()
+        self.cache = {}
+        self.cache_version = None
+        self.cache_hits = 0
+        self.cache_encodes = 0
+
+    def publish(self, scene):
+        _, changed_uids, removed_uids = scene.drain_changes()
+        if not changed_uids and not removed_uids:
+            return False
+
+        objects = dict(self.objects)
+        removed = {uid for uid in removed_uids if objects.pop(uid, None) is not None}
+        changed = set()
+        for uid in changed_uids:
+            obj = scene.get(uid)
+            if obj is None:
+                continue
+            wire = to_wire_object(obj)
+            if objects.get(uid) != wire:
+                objects[uid] = wire
+                changed.add(uid)
+        added = {uid for uid in changed if uid not in self.objects}
+        if not changed and not removed:
+            return False
+
+        with self.lock:
+            for uid in added:
+                self.object_ids.setdefault(uid, len(self.object_ids))
+            self.version += 1
+            if added or removed:
+                self.layout_version += 1
+            self.objects = objects
+            self.deltas.append((self.version, changed, removed, added))
+
+        for listener in self.listeners:
+            listener(self.version)
+        return True
+
+    def resolve(self, since):
+        with self.lock:
+            version = self.version
+            objects = self.objects
+            deltas = list(self.deltas)
+
+        if since == version:
+            base = version
+        elif (
+            not isinstance(since, int)
+            or since > version
+            or not deltas
+            or since < deltas[0][0] - 1
+        ):
+            base = None
+        else:
+            base = since
+        return version, base, objects, deltas
+
+    def merge_deltas(self, base, deltas):
+        changed = set()
+        removed = set()
+        added = set()
+        for delta_version, delta_changed, delta_removed, delta_added in deltas:
+            if delta_version <= base:
+                continue
+            changed = (changed - delta_removed) | delta_changed
+            removed = (removed - delta_changed) | delta_removed
+            added |= delta_added
+        return changed, removed, added
+
+    def build_update(self, version, base, objects, deltas):
+        if base is None:
+            return {
+                "type": "snapshot",
+                "version": version,
+                "objects": list(objects.values()),
+            }
+
+        changed, removed, _ = self.merge_deltas(base, deltas)
+        return {
+            "type": "delta",
+            "version": version,
+            "base": base,
+            "changed": [obj for uid, obj in objects.items() if uid in changed],
+            "removed": sorted(removed),
+        }
 
+    def build_binary_update(self, version, base, objects, deltas):
+        if base is None:
+            changed = set(objects)
+            removed = set()
+            added = changed
+        else:
+            changed, removed, added = self.merge_deltas(base, deltas)
+
+        side = -1
+        strings = []
+        transforms = []
+        for uid, obj in objects.items():
+            if uid not in changed:
+                continue
+            if "side" in obj:
+                side = obj["side"]
+                continue
+            if not all(key in obj for key in ("dimensions", "location", "rotation")):
+                continue
+
+            object_id = self.object_ids[uid]
+            if uid in added:
+                uid_bytes = uid.encode("utf-8")
+                model_bytes = obj.get("model", "").encode("utf-8")
+                strings.append(
+                    BINARY_STRING.pack(object_id, len(uid_bytes), len(model_bytes))
+                    + uid_bytes
+                    + model_bytes
+                )
+            transforms.append(
+                BINARY_TRANSFORM.pack(
+                    object_id, *obj["dimensions"], *obj["location"], *obj["rotation"]
+                )
+            )
 
-def get_next_uid(objects_data, base_uid):
-    uids = [obj["uid"] for obj in objects_data if obj["uid"].startswith(base_uid)]
-    max_index = 0
-    for uid in uids:
+        removed_ids = [
+            BINARY_REMOVED.pack(self.object_ids[uid])
+            for uid in sorted(removed)
+            if uid in self.object_ids
+        ]
+        header = BINARY_HEADER.pack(
+            BINARY_SNAPSHOT if base is None else BINARY_DELTA,
+            side,
+            version,
+            NO_BASE if base is None else base,
+            len(strings),
+            len(transforms),
+            len(removed_ids),
+        )
+        return b"".join([header, *strings, *transforms, *removed_ids])
+
+    def get_update(self, since=None):
+        return self.build_update(*self.resolve(since))
+
+    def encode_update(self, since=None, binary=False):
+        version, base, objects, deltas = self.resolve(since)
+        key = (binary, base, version)
+
+        with self.cache_lock:
+            if self.cache_version != version:
+                self.cache = {}
+                self.cache_version = version
+            frame = self.cache.get(key)
+            if frame is not None:
+                self.cache_hits += 1
+                return version, base, frame
+
+        start = time.perf_counter()
+        if binary:
+            payload = self.build_binary_update(version, base, objects, deltas)
+        else:
+            update = self.build_update(version, base, objects, deltas)
+            payload = json.dumps(update).encode("utf-8")
+        frame = frame_message(payload)
+        if self.profiler is not None:
+            self.profiler.record("serialize", time.perf_counter() - start)
+
+        with self.cache_lock:
+            self.cache_encodes += 1
+            if self.cache_version == version:
+                self.cache[key] = frame
+        return version, base, frame
+
+    def cache_stats(self):
+        with self.cache_lock:
+            return {
+                "version": self.cache_version,
+                "entries": len(self.cache),
+                "hits": self.cache_hits,
+                "encodes": self.cache_encodes,
+            }
+
+
+class SceneServer:
+    def __init__(self, scene_history, host, port, backlog=128):
+        self.scene_history = scene_history
+        self.reports = {"cache_stats": scene_history.cache_stats}
+        self.commands = queue.SimpleQueue()
+        self.loop = asyncio.new_event_loop()
+        self.changed_event = None
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server_socket.bind((host, port))
+        self.server_socket.listen(backlog)
+
+    def start(self):
+        self.scene_history.listeners.append(self.notify)
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
         try:
-            index = int(uid.split("_")[1])
-            if index > max_index:
-                max_index = index
-        except ValueError:
-            continue
-    return f"{base_uid}_{max_index + 1}"
+            self.loop.run_until_complete(self.serve())
+        except OSError:
+            print("Erro ao aceitar novas conexões.")
+
+    async def serve(self):
+        self.changed_event = asyncio.Event()
+        server = await asyncio.start_server(self.handle_client, sock=self.server_socket)
+        async with server:
+            await server.serve_forever()
+
+    def notify(self, version):
+        self.loop.call_soon_threadsafe(self.wake)
+
+    def wake(self):
+        if self.changed_event is not None:
+            self.changed_event.set()
+            self.changed_event = asyncio.Event()
+
+    async def wait_for_change(self, version, timeout):
+        changed_event = self.changed_event
+        if self.scene_history.version != version:
+            return
+        try:
+            await asyncio.wait_for(changed_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def handle_client(self, reader, writer):
+        addr = writer.get_extra_info("peername")
+        print(f"Conexão estabelecida com {addr}")
+        subscription = None
+        try:
+            while True:
+                data = await read_message(reader)
+                if not data:
+                    print(f"Conexão encerrada por {addr}")
+                    break
+                message = json.loads(data.decode("utf-8"))
 
+                if message["action"] == "get_object":
+                    _, _, frame = self.scene_history.encode_update(
+                        message.get("version"), message.get("format") == "binary"
+                    )
+                    await write_frame(writer, frame)
+                elif message["action"] == "command":
+                    accepted = message.get("command") in COMMANDS
+                    if accepted:
+                        self.commands.put(message["command"])
+                    await write_message(
+                        writer, json.dumps({"ok": accepted}).encode("utf-8")
+                    )
+                elif message["action"] in self.reports:
+                    report = self.reports[message["action"]]()
+                    await write_message(writer, json.dumps(report).encode("utf-8"))
+                elif message["action"] == "subscribe" and subscription is None:
+                    subscription = asyncio.create_task(
+                        self.subscribe(
+                            writer,
+                            message.get("version"),
+                            message.get("max_rate"),
+                            message.get("format") == "binary",
+                        )
+                    )
+        except Exception as e:
+            print(f"Erro com o cliente {addr}: {e}")
+
+        if subscription is not None:
+            subscription.cancel()
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except OSError:
+            print(f"Erro ao tentar fechar a conexão com {addr}")
+
+    async def subscribe(self, writer, version, max_rate, binary=False):
+        min_interval = 1.0 / max_rate if max_rate else 0
+        last_sent = 0
+        try:
+            while True:
+                current, base, frame = self.scene_history.encode_update(version, binary)
+                if (
+                    base != current
+                    or time.monotonic() - last_sent >= SUBSCRIBE_HEARTBEAT
+                ):
+                    await write_frame(writer, frame)
+                    last_sent = time.monotonic()
+                version = current
+
+                await self.wait_for_change(version, SUBSCRIBE_HEARTBEAT)
+                if min_interval:
+                    delay = last_sent + min_interval - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+        except (ConnectionError, OSError):
+            writer.close()
+
+
+class FrameGrabber:
+    def __init__(self, cap, slots=CAPTURE_SLOTS, drop_frames=True):
+        self.cap = cap
+        self.drop_frames = drop_frames
+        self.slots = [None] * max(slots, 3)
+        self.condition = threading.Condition()
+        self.latest = None
+        self.in_use = None
+        self.sequence = 0
+        self.consumed = 0
+        self.captured = 0
+        self.dropped = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.thread.join()
+
+    def run(self):
+        while self.running:
+            with self.condition:
+                if not self.drop_frames:
+                    self.condition.wait_for(
+                        lambda: self.sequence == self.consumed or not self.running
+                    )
+                    if not self.running:
+                        break
+                index = next(
+                    i
+                    for i in range(len(self.slots))
+                    if i != self.latest and i != self.in_use
+                )
 
-def display_objects_grid(frame_with_background, objects_data):
+            if self.slots[index] is None:
+                ret, frame = self.cap.read()
+            else:
+                ret, frame = self.cap.read(self.slots[index])
+
+            with self.condition:
+                if not ret:
+                    self.running = False
+                    self.condition.notify_all()
+                    break
+
+                self.slots[index] = frame
+                if self.sequence > self.consumed:
+                    self.dropped += 1
+                self.latest = index
+                self.sequence += 1
+                self.captured += 1
+                self.condition.notify_all()
+
+    def read(self, timeout=None):
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.sequence > self.consumed or not self.running, timeout
+            )
+            if self.sequence <= self.consumed:
+                return False, None
+
+            self.in_use = self.latest
+            self.consumed = self.sequence
+            if not self.drop_frames:
+                self.condition.notify_all()
+            return True, self.slots[self.in_use]
+
+    def stats(self):
+        with self.condition:
+            return {
+                "captured": self.captured,
+                "delivered": self.captured - self.dropped,
+                "dropped": self.dropped,
+            }
+
+
+class InferencePipeline:
+    def __init__(self, models, pin_models=PIN_INFERENCE_MODELS):
+        self.models = models
+        if pin_models:
+            self.executors = {
+                name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+                for name in models
+            }
+        else:
+            executor = ThreadPoolExecutor(max_workers=len(models))
+            self.executors = {name: executor for name in models}
+        self.latencies = {}
+
+    def timed(self, name, rgb_frame):
+        start = time.perf_counter()
+        result = self.models[name](rgb_frame)
+        self.latencies[name] = time.perf_counter() - start
+        return result
+
+    def run(self, rgb_frame, names=None):
+        futures = {
+            name: self.executors[name].submit(self.timed, name, rgb_frame)
+            for name in (self.models if names is None else names)
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+    def shutdown(self):
+        for executor in set(self.executors.values()):
+            executor.shutdown(wait=False)
+
+
+class InferenceScheduler:
+    def __init__(
+        self,
+        models=MODEL_SCHEDULE,
+        target_fps=HAND_TRACKING_FPS,
+        rate_window=SCHEDULE_RATE_WINDOW,
+        clock=time.monotonic,
+    ):
+        self.lock = threading.Lock()
+        self.clock = clock
+        self.frame_budget = 1.0 / target_fps
+        self.rate_window = rate_window
+        self.frame_time = 0.0
+        self.models = {
+            name: {
+                "rate": config.get("rate"),
+                "budget": config["budget"],
+                "priority": config["priority"],
+                "decimation": 1.0,
+                "last_run": None,
+                "latency": 0.0,
+                "runs": deque(maxlen=256),
+            }
+            for name, config in models.items()
+        }
+
+    def due(self, name, now):
+        model = self.models[name]
+        if model["priority"] == 0 or not model["rate"] or model["last_run"] is None:
+            return True
+        interval = model["decimation"] / model["rate"]
+        return now - model["last_run"] >= interval
+
+    def select(self, names, now):
+        return [name for name in names if self.due(name, now)]
+
+    def record(self, name, now, latency=None):
+        with self.lock:
+            model = self.models[name]
+            model["last_run"] = now
+            model["runs"].append(now)
+        if latency is not None:
+            self.observe(name, latency)
+
+    def observe(self, name, latency):
+        with self.lock:
+            model = self.models[name]
+            model["latency"] = 0.8 * model["latency"] + 0.2 * latency
+
+    def decimate(self, model):
+        model["decimation"] = min(MAX_DECIMATION, model["decimation"] * 2)
+
+    def boost(self, model):
+        model["decimation"] = max(MIN_DECIMATION, model["decimation"] / 2)
+
+    def end_frame(self, frame_time):
+        with self.lock:
+            self.frame_time = 0.8 * self.frame_time + 0.2 * frame_time
+            adjustable = sorted(
+                (model for model in self.models.values() if model["priority"] > 0),
+                key=lambda model: model["priority"],
+            )
+            if self.frame_time > self.frame_budget:
+                candidates = [
+                    model
+                    for model in reversed(adjustable)
+                    if model["decimation"] < MAX_DECIMATION
+                ]
+                over_budget = [
+                    model for model in candidates if model["latency"] > model["budget"]
+                ]
+                if candidates:
+                    self.decimate((over_budget or candidates)[0])
+            elif self.frame_time < self.frame_budget * SCHEDULE_IDLE_RATIO:
+                for model in adjustable:
+                    if model["decimation"] > MIN_DECIMATION:
+                        self.boost(model)
+                        break
+
+    def snapshot(self):
+        now = self.clock()
+        with self.lock:
+            return {
+                "frame_budget": self.frame_budget,
+                "frame_time": self.frame_time,
+                "models": {
+                    name: {
+                        "priority": model["priority"],
+                        "target_rate": model["rate"],
+                        "scheduled_rate": (
+                            model["rate"] / model["decimation"]
+                            if model["rate"] and model["priority"] > 0
+                            else None
+                        ),
+                        "achieved_rate": sum(
+                            1 for run in model["runs"] if now - run <= self.rate_window
+                        )
+                        / self.rate_window,
+                        "decimation": model["decimation"],
+                        "latency": model["latency"],
+                        "budget": model["budget"],
+                    }
+                    for name, model in self.models.items()
+                },
+            }
+
+
+class FrameClock:
+    def __init__(self, rate=None):
+        self.rate = rate
+        self.frame = 0
+
+    def __call__(self):
+        if self.rate:
+            return self.frame / self.rate
+        return time.monotonic()
+
+    def tick(self):
+        self.frame += 1
+
+
+class MotionGate:
+    def __init__(
+        self,
+        size=MOTION_SIZE,
+        pixel_threshold=MOTION_PIXEL_THRESHOLD,
+        area_threshold=MOTION_AREA_THRESHOLD,
+        idle_delay=MOTION_IDLE_DELAY,
+        idle_interval=MOTION_IDLE_INTERVAL,
+        clock=time.monotonic,
+    ):
+        self.clock = clock
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.area_threshold = area_threshold
+        self.idle_delay = idle_delay
+        self.idle_interval = idle_interval
+        self.small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self.gray = np.empty((size[1], size[0]), dtype=np.uint8)
+        self.previous = np.empty_like(self.gray)
+        self.diff = np.empty_like(self.gray)
+        self.primed = False
+        self.changed = 0.0
+        self.last_motion = clock()
+        self.last_idle_run = 0.0
+        self.skipped = 0
+        self.active = True
+
+    def update(self, frame, now):
+        cv2.resize(frame, self.size, dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        if self.primed:
+            cv2.absdiff(self.gray, self.previous, dst=self.diff)
+            cv2.threshold(
+                self.diff, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=self.diff
+            )
+            self.changed = cv2.countNonZero(self.diff) / self.diff.size
+        else:
+            self.changed = 1.0
+            self.primed = True
+        self.gray, self.previous = self.previous, self.gray
+
+        if self.changed >= self.area_threshold:
+            self.last_motion = now
+        self.active = now - self.last_motion < self.idle_delay
+        return self.active
+
+    def allow(self, now):
+        if self.active or now - self.last_idle_run >= self.idle_interval:
+            self.last_idle_run = now
+            return True
+        self.skipped += 1
+        return False
+
+    def snapshot(self):
+        return {
+            "active": self.active,
+            "changed": self.changed,
+            "idle_seconds": max(0.0, self.clock() - self.last_motion),
+            "skipped_frames": self.skipped,
+        }
+
+
+class AdaptiveInterval:
+    def __init__(
+        self,
+        interval=DETECTION_INTERVAL,
+        min_interval=DETECTION_MIN_INTERVAL,
+        max_interval=DETECTION_MAX_INTERVAL,
+        clock=time.monotonic,
+    ):
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.last_run = clock()
+        self.pending = False
+
+    def due(self, now):
+        if self.pending:
+            return now - self.last_run >= self.max_interval
+        return now - self.last_run >= self.interval
+
+    def started(self, now):
+        self.last_run = now
+        self.pending = True
+
+    def finished(self, found):
+        self.pending = False
+        if found:
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+
+
+class Sprite:
+    def __init__(self, image):
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        self.shape = image.shape[:2]
+        self.scratch = np.empty((*self.shape, 3), dtype=np.uint16)
+        if image.shape[2] == 4:
+            alpha = image[:, :, 3:4].astype(np.uint16)
+            self.color = None
+            self.premultiplied = image[:, :, :3].astype(np.uint16) * alpha + 127
+            self.inverse_alpha = 255 - alpha
+        else:
+            self.color = np.ascontiguousarray(image[:, :, :3])
+
+
+class SpriteCache:
+    def __init__(self, root=IMAGES_PATH, check_interval=SPRITE_CHECK_INTERVAL):
+        self.root = root
+        self.check_interval = check_interval
+        self.entries = {}
+        self.generation = 0
+        self.last_refresh = time.monotonic()
+
+    def check(self, name, now):
+        entry = self.entries.get(name)
+        if entry is None or now - entry["checked"] >= self.check_interval:
+            path = os.path.join(self.root, name + ".png")
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                mtime = None
+
+            if entry is None or entry["mtime"] != mtime:
+                if entry is not None:
+                    self.generation += 1
+                image = None
+                if mtime is not None:
+                    image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+                entry = {"mtime": mtime, "image": image, "sprites": {}}
+                self.entries[name] = entry
+            entry["checked"] = now
+        return entry
+
+    def refresh(self):
+        now = time.monotonic()
+        if now - self.last_refresh >= self.check_interval:
+            self.last_refresh = now
+            for name in list(self.entries):
+                self.check(name, now)
+        return self.generation
+
+    def get(self, name, size):
+        entry = self.check(name, time.monotonic())
+        if entry["image"] is None:
+            return None
+
+        sprite = entry["sprites"].get(size)
+        if sprite is None:
+            sprite = Sprite(cv2.resize(entry["image"], size))
+            entry["sprites"][size] = sprite
+        return sprite
+
+
+sprite_cache = SpriteCache()
+
+
+def blend_sprite(frame, sprite, x, y):
+    height, width = sprite.shape
+    x1, y1 = max(x, 0), max(y, 0)
+    x2 = min(x + width, frame.shape[1])
+    y2 = min(y + height, frame.shape[0])
+    if x1 >= x2 or y1 >= y2:
+        return
+
+    roi = frame[y1:y2, x1:x2]
+    rows = slice(y1 - y, y2 - y)
+    cols = slice(x1 - x, x2 - x)
+    if sprite.color is not None:
+        roi[:] = sprite.color[rows, cols]
+        return
+
+    scratch = sprite.scratch[rows, cols]
+    np.multiply(roi, sprite.inverse_alpha[rows, cols], out=scratch)
+    scratch += sprite.premultiplied[rows, cols]
+    scratch //= 255
+    roi[:] = scratch
+
+
+def display_objects_grid(frame_with_background, furniture):
     square_width = 50
     square_height = 43
     margin_x = 0
     margin_y = 11
 
-    for i, obj in enumerate(objects_data):
-        if obj["uid"] not in ["floor", "rotate"]:
-            img_path = "assets/images/" + obj.get("uid", "").split("_")[0] + ".png"
-            if os.path.exists(img_path):
-                if i == 2:
-                    margin_x += 11
-                else:
-                    margin_x += 20
-                y_offset = FRAME_HEIGHT - square_height - margin_y
-                x_offset = square_width * (i - 2) + margin_x
-                try:
-                    obj_img = cv2.imread(img_path, cv2.IMREAD_UNCHANGED)
-
-                    if obj_img.shape[2] == 4:
-                        obj_img = cv2.resize(obj_img, (square_width, square_height))
-                        alpha_channel = obj_img[:, :, 3] / 255.0
-
-                        for c in range(3):
-                            frame_with_background[
-                                y_offset : y_offset + square_height,
-                                x_offset : x_offset + square_width,
-                                c,
-                            ] = (1.0 - alpha_channel) * frame_with_background[
-                                y_offset : y_offset + square_height,
-                                x_offset : x_offset + square_width,
-                                c,
-                            ] + alpha_channel * obj_img[
-                                :, :, c
-                            ]
-                    else:
-                        obj_img = cv2.resize(obj_img, (square_width, square_height))
-                        frame_with_background[
-                            y_offset : y_offset + square_height,
-                            x_offset : x_offset + square_width,
-                        ] = obj_img
-
-                    if i - 2 == selected_object_index:
-
-                        border_x_offset = (
-                            square_width * selected_object_index + margin_x
-                        )
-                        cv2.rectangle(
-                            frame_with_background,
-                            (border_x_offset - 2, y_offset - 2),
-                            (
-                                border_x_offset + square_width + 2,
-                                y_offset + square_height + 2,
-                            ),
-                            (0, 215, 255),
-                            3,
-                        )
+    for i, uid in enumerate(furniture):
+        name = uid.split("_")[0]
+        thumbnail = sprite_cache.get(name, (square_width, square_height))
+        if thumbnail is None:
+            continue
 
-                        center_x = FRAME_WIDTH // 2
-                        center_y = FRAME_HEIGHT // 2
-
-                        selected_img = cv2.imread(img_path, cv2.IMREAD_UNCHANGED)
-                        if selected_img is not None:
-                            selected_img = cv2.resize(selected_img, (150, 150))
-                            alpha_channel = (
-                                selected_img[:, :, 3] / 255.0
-                                if selected_img.shape[2] == 4
-                                else None
-                            )
-
-                            img_height, img_width = selected_img.shape[:2]
-                            y1 = center_y - img_height // 2
-                            y2 = y1 + img_height
-                            x1 = center_x - img_width // 2
-                            x2 = x1 + img_width
-
-                            if alpha_channel is not None:
-                                for c in range(3):
-                                    frame_with_background[y1:y2, x1:x2, c] = (
-                                        alpha_channel * selected_img[:, :, c]
-                                        + (1 - alpha_channel)
-                                        * frame_with_background[y1:y2, x1:x2, c]
-                                    )
-                            else:
-                                frame_with_background[y1:y2, x1:x2] = selected_img
-
-                except Exception as e:
-                    print(f"Erro ao carregar a imagem do objeto {obj['uid']}: {e}")
-
-                x_offset += square_width + margin_x
-                if x_offset + square_width > FRAME_WIDTH:
-                    x_offset = 0
-                    y_offset -= square_height + margin_y
+        if i == 0:
+            margin_x += 11
+        else:
+            margin_x += 20
+        y_offset = FRAME_HEIGHT - square_height - margin_y
+        x_offset = square_width * i + margin_x
+        blend_sprite(frame_with_background, thumbnail, x_offset, y_offset)
+
+        if i == selected_object_index:
+            cv2.rectangle(
+                frame_with_background,
+                (x_offset - 2, y_offset - 2),
+                (x_offset + square_width + 2, y_offset + square_height + 2),
+                (0, 215, 255),
+                3,
+            )
 
-    return frame_with_background
+            preview = sprite_cache.get(name, PREVIEW_SIZE)
+            img_height, img_width = preview.shape
+            blend_sprite(
+                frame_with_background,
+                preview,
+                FRAME_WIDTH // 2 - img_width // 2,
+                FRAME_HEIGHT // 2 - img_height // 2,
+            )
 
+    return frame_with_background
 
-def start_server():
-    host = "127.0.0.1"
-    port = 65432
 
-    objects_data = load_objects_data()
+class PreviewStreamer:
+    def __init__(self, host, port, fps=PREVIEW_FPS, quality=PREVIEW_QUALITY):
+        self.address = (host, port)
+        self.interval = 1.0 / fps
+        self.quality = quality
+        self.condition = threading.Condition()
+        self.pending = None
+        self.encoding = None
+        self.has_pending = False
+        self.last_offer = 0.0
+        self.jpeg = None
+        self.sequence = 0
+        self.running = False
+
+    def start(self):
+        streamer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type", "multipart/x-mixed-replace; boundary=frame"
+                )
+                self.end_headers()
+                sequence = 0
+                try:
+                    while streamer.running:
+                        jpeg, sequence = streamer.wait_for_frame(sequence)
+                        if jpeg is None:
+                            continue
+                        self.wfile.write(
+                            b"--frame\r\nContent-Type: image/jpeg\r\n"
+                            + f"Content-Length: {len(jpeg)}\r\n\r\n".encode()
+                            + jpeg
+                            + b"\r\n"
+                        )
+                except (ConnectionError, OSError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self.running = True
+        self.http_server = ThreadingHTTPServer(self.address, Handler)
+        self.http_server.daemon_threads = True
+        threading.Thread(target=self.http_server.serve_forever, daemon=True).start()
+        threading.Thread(target=self.encode_frames, daemon=True).start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.http_server.shutdown()
+
+    def offer(self, frame, now):
+        if now - self.last_offer < self.interval:
+            return
+        self.last_offer = now
+        with self.condition:
+            if self.pending is None or self.pending.shape != frame.shape:
+                self.pending = np.empty_like(frame)
+            np.copyto(self.pending, frame)
+            self.has_pending = True
+            self.condition.notify_all()
+
+    def encode_frames(self):
+        while self.running:
+            with self.condition:
+                self.condition.wait_for(lambda: self.has_pending or not self.running)
+                if not self.running:
+                    break
+                self.pending, self.encoding = self.encoding, self.pending
+                self.has_pending = False
 
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.bind((host, port))
-    server_socket.listen(5)
+            ok, jpeg = cv2.imencode(
+                ".jpg", self.encoding, [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+            )
+            if ok:
+                with self.condition:
+                    self.jpeg = jpeg.tobytes()
+                    self.sequence += 1
+                    self.condition.notify_all()
+
+    def wait_for_frame(self, sequence, timeout=1.0):
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.sequence != sequence or not self.running, timeout
+            )
+            return self.jpeg if self.sequence != sequence else None, self.sequence
+
+
+class FrameCompositor:
+    def __init__(self, background):
+        self.background = background
+        self.layer = np.empty_like(background)
+        self.output = np.empty_like(background)
+        self.layer_key = None
+        self.layer_renders = 0
+
+    def compose(self, key, scene):
+        if key != self.layer_key:
+            np.copyto(self.layer, self.background)
+            display_objects_grid(self.layer, scene.furniture())
+            self.layer_key = key
+            self.layer_renders += 1
+
+        np.copyto(self.output, self.layer)
+        return self.output
+
+
+def start_server(
+    headless=HEADLESS,
+    preview_port=PREVIEW_PORT,
+    profile=PROFILE_STAGES,
+    profile_dump=PROFILE_DUMP_PATH,
+    source=CAPTURE_SOURCE,
+    capture=None,
+    model_overrides=None,
+    detect_objects=True,
+    max_frames=None,
+    drop_frames=True,
+    objects_data=None,
+    persist=True,
+    port=65432,
+    serve=True,
+    clock=None,
+):
+    host = "127.0.0.1"
+    if clock is None:
+        clock = FrameClock()
+
+    if objects_data is None:
+        objects_data = load_objects_data()
+    scene = SceneStore(objects_data)
+    journal = None
+    if persist:
+        journal = SceneJournal(FILE_PATH, scene.to_list()).start()
+        scene.listeners.append(journal.on_change)
+    profiler = StageProfiler(
+        enabled=profile or bool(profile_dump), dump_path=profile_dump
+    )
+    scene_history = SceneHistory(profiler=profiler)
+    scene_history.publish(scene)
+
+    scene_server = SceneServer(scene_history, host, port)
+    scheduler = InferenceScheduler(clock=clock)
+    scene_server.reports["schedule"] = scheduler.snapshot
+    motion_gate = MotionGate(clock=clock)
+    scene_server.reports["motion"] = motion_gate.snapshot
+    scene_server.reports["stats"] = profiler.snapshot
+    frame_buffers = FrameBuffers(trace=ALLOCATION_TRACE)
+    scene_server.reports["buffers"] = frame_buffers.snapshot
+    if journal is not None:
+        scene_server.reports["journal"] = journal.snapshot
+    preview = None
+    if preview_port:
+        preview = PreviewStreamer(host, preview_port).start()
+        print(f"Pré-visualização MJPEG em http://{host}:{preview_port}/")
     print(f"Servidor ouvindo em {host}:{port}...")
 
     def dict_to_object(uid, dimensions, location, rotation, model):
@@ -188,33 +1101,64 @@ def start_server():
         }
 
     def object_detection_and_hand_detection():
-        global selected_object_index, old_l_wrist_x, old_r_wrist_x, selected_axis, scale, rotate, delete, side
-        face_left_location = None
-        face_right_location = None
-        head_rotation = False
+        global selected_object_index, selected_axis, scale, rotate, delete, side
         thumb_x_last_position = None
-        cap = cv2.VideoCapture(0)
+        swipe_tracker = SwipeTracker()
+        cap = capture if capture is not None else cv2.VideoCapture(source)
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
 
         if not cap.isOpened():
-            return
-
-        base_options = python.BaseOptions(model_asset_path=MODEL_PATH)
-        options = vision.ObjectDetectorOptions(
-            base_options=base_options, score_threshold=0.5
-        )
-        detector = vision.ObjectDetector.create_from_options(options)
+            if journal is not None:
+                journal.close()
+            return None
+
+        grabber = FrameGrabber(cap, drop_frames=drop_frames).start()
+        scene_server.reports["capture"] = grabber.stats
+
+        detection_results = queue.SimpleQueue()
+        detection_started = {}
+        detector = None
+        if detect_objects:
+            base_options = python.BaseOptions(model_asset_path=MODEL_PATH)
+
+            def on_detection(result, output_image, timestamp_ms):
+                started = detection_started.pop(timestamp_ms, None)
+                if started is not None:
+                    scheduler.observe("detector", time.perf_counter() - started)
+                detection_results.put(result)
+
+            options = vision.ObjectDetectorOptions(
+                base_options=base_options,
+                score_threshold=0.5,
+                running_mode=vision.RunningMode.LIVE_STREAM,
+                result_callback=on_detection,
+            )
+            detector = vision.ObjectDetector.create_from_options(options)
+        detection_interval = AdaptiveInterval(clock=clock)
+
+        inference_models = dict(model_overrides or {})
+        if "hands" not in inference_models:
+            mp_hands = mp.solutions.hands
+            hands = mp_hands.Hands(
+                min_detection_confidence=0.7, min_tracking_confidence=0.7
+            )
+            hand_tracker = HandTracker(
+                hands,
+                (INFERENCE_WIDTH, INFERENCE_HEIGHT),
+                roi=HAND_ROI,
+                buffers=frame_buffers,
+            )
+            inference_models["hands"] = hand_tracker.process
 
-        mp_hands = mp.solutions.hands
-        hands = mp_hands.Hands(
-            min_detection_confidence=0.7, min_tracking_confidence=0.7
-        )
+        head_pose_estimator = None
+        if "head_pose" not in inference_models:
+            head_pose_estimator = HeadPoseEstimator(
+                HEAD_POSE_MODEL, roi=HEAD_POSE_ROI, buffers=frame_buffers
+            )
+            inference_models["head_pose"] = head_pose_estimator.process
 
-        mp_face_mesh = mp.solutions.face_mesh
-        face_mesh = mp_face_mesh.FaceMesh(
-            min_detection_confidence=0.5, min_tracking_confidence=0.5
-        )
+        pipeline = InferencePipeline(inference_models)
 
         try:
             background = cv2.imread("assets/images/background.png")
@@ -227,24 +1171,63 @@ def start_server():
         except Exception:
             background = np.ones((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8) * 255
 
-        last_detection_time = time.time()
+        compositor = FrameCompositor(background)
 
         grabbed = False
         rotated = False
         is_scissors = False
 
+        frames = 0
         while True:
-            ret, frame = cap.read()
+            profiler.start_frame()
+            ret, frame = grabber.read()
             if not ret:
                 break
-
-            frame = cv2.flip(frame, 1)
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            current_time = time.time()
-            if current_time - last_detection_time >= 3:
-                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
-                detection_result = detector.detect(mp_image)
+            profiler.lap("capture")
+
+            frame_start = time.monotonic()
+            frame_buffers.start_frame()
+            frame = cv2.flip(frame, 1, dst=frame_buffers.get("flipped", frame.shape))
+            rgb_frame = cv2.cvtColor(
+                frame,
+                cv2.COLOR_BGR2RGB,
+                dst=frame_buffers.get("rgb", frame.shape),
+            )
+            profiler.lap("convert")
+
+            current_time = clock()
+            motion_gate.update(frame, current_time)
+            inference_allowed = motion_gate.allow(current_time)
+            profiler.lap("motion")
+
+            if (
+                detector is not None
+                and inference_allowed
+                and scheduler.due("detector", current_time)
+                and detection_interval.due(current_time)
+            ):
+                timestamp_ms = int(current_time * 1000)
+                detection_started[timestamp_ms] = time.perf_counter()
+                detector.detect_async(
+                    mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame),
+                    timestamp_ms,
+                )
+                detection_interval.started(current_time)
+                scheduler.record("detector", current_time)
+            profiler.lap("detection")
+
+            models = []
+            if inference_allowed:
+                models = scheduler.select(["hands", "head_pose"], current_time)
+            model_results = pipeline.run(rgb_frame, models)
+            for name in models:
+                scheduler.record(name, current_time, pipeline.latencies.get(name))
+                profiler.record(name, pipeline.latencies.get(name, 0.0))
+            profiler.lap("inference")
+
+            while not detection_results.empty():
+                detection_result = detection_results.get_nowait()
+                object_count = len(scene)
 
                 for detection in detection_result.detections:
                     detection_class = detection.categories[0].category_name
@@ -253,12 +1236,9 @@ def start_server():
                     if detection_class in allowed_classes:
                         location = [0, 0, 0.1]
                         rotation = [90, 0, 0]
-                        filtered_objects = objects_data[2:]
-                        if not any(
-                            obj["location"] == location for obj in filtered_objects
-                        ):
+                        if not scene.has_location(location):
                             if detection_class == "cup" and detection_score >= 0.5:
-                                uid = get_next_uid(objects_data, "coffee-table")
+                                uid = scene.next_uid("coffee-table")
                                 data = dict_to_object(
                                     uid,
                                     [0.002, 0.002, 0.001],
@@ -266,9 +1246,9 @@ def start_server():
                                     rotation,
                                     "coffee-table.obj",
                                 )
-                                objects_data.append(data)
+                                scene.put(data)
                             elif detection_class == "chair" and detection_score >= 0.5:
-                                uid = get_next_uid(objects_data, "couch")
+                                uid = scene.next_uid("couch")
                                 data = dict_to_object(
                                     uid,
                                     [0.002, 0.002, 0.002],
@@ -276,12 +1256,12 @@ def start_server():
                                     rotation,
                                     "couch.obj",
                                 )
-                                objects_data.append(data)
+                                scene.put(data)
                             elif (
                                 detection_class == "cell phone"
                                 and detection_score >= 0.5
                             ):
-                                uid = get_next_uid(objects_data, "playstation")
+                                uid = scene.next_uid("playstation")
                                 data = dict_to_object(
                                     uid,
                                     [0.15, 0.15, 0.15],
@@ -289,9 +1269,9 @@ def start_server():
                                     rotation,
                                     "playstation.obj",
                                 )
-                                objects_data.append(data)
+                                scene.put(data)
                             elif detection_class == "bed" and detection_score >= 0.5:
-                                uid = get_next_uid(objects_data, "bed")
+                                uid = scene.next_uid("bed")
                                 data = dict_to_object(
                                     uid,
                                     [2, 2, 2],
@@ -299,169 +1279,67 @@ def start_server():
                                     [90, 0, -90],
                                     "bed.obj",
                                 )
-                                objects_data.append(data)
-
-                last_detection_time = current_time
-
-            frame_with_background = background.copy()
-
-            face_results = face_mesh.process(rgb_frame)
-
-            if face_results.multi_face_landmarks:
-                for face_landmarks in face_results.multi_face_landmarks:
-                    for index, landmark in enumerate(face_landmarks.landmark):
-                        y = int(landmark.y * frame.shape[0])
-                        if index == 234:
-                            face_left_location = y
-                        elif index == 454:
-                            face_right_location = y
-
-                        if face_left_location and face_right_location:
-                            diff = face_left_location - face_right_location
-                            if diff > 50 and not head_rotation:
-                                head_rotation = True
-                                if side < 3:
-                                    side += 1
-                                else:
-                                    side = 0
-                            elif diff < -50 and not head_rotation:
-                                if side == 0:
-                                    side = 3
-                                else:
-                                    side -= 1
-                                head_rotation = True
-                            elif diff > -50 and diff < 50:
-                                head_rotation = False
-
-                        objects_data[1]["side"] = side
-
-            results = hands.process(rgb_frame)
-
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    wrist = hand_landmarks.landmark[mp_hands.HandLandmark.WRIST]
-                    thumb = hand_landmarks.landmark[mp_hands.HandLandmark.THUMB_CMC]
-                    thumb_tip = hand_landmarks.landmark[mp_hands.HandLandmark.THUMB_TIP]
-                    index_tip = hand_landmarks.landmark[
-                        mp_hands.HandLandmark.INDEX_FINGER_TIP
-                    ]
-                    middle_tip = hand_landmarks.landmark[
-                        mp_hands.HandLandmark.MIDDLE_FINGER_TIP
-                    ]
-                    ring_tip = hand_landmarks.landmark[
-                        mp_hands.HandLandmark.RING_FINGER_TIP
-                    ]
-                    pinky_tip = hand_landmarks.landmark[mp_hands.HandLandmark.PINKY_TIP]
-
-                    index_pip = hand_landmarks.landmark[
-                        mp_hands.HandLandmark.INDEX_FINGER_PIP
-                    ]
-                    middle_pip = hand_landmarks.landmark[
-                        mp_hands.HandLandmark.MIDDLE_FINGER_PIP
-                    ]
-                    ring_pip = hand_landmarks.landmark[
-                        mp_hands.HandLandmark.RING_FINGER_PIP
-                    ]
-                    pinky_pip = hand_landmarks.landmark[mp_hands.HandLandmark.PINKY_PIP]
-
-                    thumb_x, thumb_y = int(thumb_tip.x * FRAME_WIDTH), int(
-                        thumb_tip.y * FRAME_HEIGHT
-                    )
-                    index_x, index_y = int(index_tip.x * FRAME_WIDTH), int(
-                        index_tip.y * FRAME_HEIGHT
-                    )
-                    distance = sqrt((thumb_x - index_x) ** 2 + (thumb_y - index_y) ** 2)
+                                scene.put(data)
 
-                    for connection in mp_hands.HAND_CONNECTIONS:
-                        start_idx, end_idx = connection
-                        start = hand_landmarks.landmark[start_idx]
-                        end = hand_landmarks.landmark[end_idx]
+                detection_interval.finished(len(scene) > object_count)
+            profiler.lap("detection_results")
 
-                        start_x, start_y = int(start.x * FRAME_WIDTH), int(
-                            start.y * FRAME_HEIGHT
-                        )
-                        end_x, end_y = int(end.x * FRAME_WIDTH), int(
-                            end.y * FRAME_HEIGHT
-                        )
+            head_pose = model_results.get("head_pose")
+            if head_pose is not None and head_pose["step"]:
+                side = (side + head_pose["step"]) % 4
+                scene.put({**(scene.get("rotate") or {"uid": "rotate"}), "side": side})
 
-                        cv2.line(
-                            frame_with_background,
-                            (start_x, start_y),
-                            (end_x, end_y),
-                            (0, 0, 255),
-                            2,
-                        )
-
-                    for idx, landmark in enumerate(hand_landmarks.landmark):
-                        x = int(landmark.x * FRAME_WIDTH)
-                        y = int(landmark.y * FRAME_HEIGHT)
-                        cv2.circle(frame_with_background, (x, y), 5, (0, 0, 255), -1)
+            hand_array = model_results.get("hands")
+            if hand_array is None:
+                hand_array = np.empty((0, 21, 3), dtype=np.float32)
+            gestures = classify_hands(hand_array, FRAME_WIDTH, FRAME_HEIGHT)
 
-                    if wrist.x < thumb.x:
-                        index_extended = index_tip.y < index_pip.y
-                        middle_extended = middle_tip.y < middle_pip.y
+            if len(hand_array):
+                for hand in range(len(hand_array)):
+                    left = bool(gestures["left"][hand])
+                    right = bool(gestures["right"][hand])
+                    distance = float(gestures["pinch_distance"][hand])
+                    thumb_x = int(gestures["thumb_tip_x"][hand])
+                    thumb_cmc_x, thumb_cmc_y = gestures["thumb"][hand].tolist()
 
-                        ring_folded = ring_tip.y > ring_pip.y
-                        pinky_folded = pinky_tip.y > pinky_pip.y
-
-                        is_scissors = (
-                            index_extended
-                            and middle_extended
-                            and ring_folded
-                            and pinky_folded
-                        )
+                    if left:
+                        is_scissors = bool(gestures["scissors"][hand])
 
-                    if wrist.x > thumb.x and distance < 50:
+                    if gestures["pinching"][hand]:
                         grabbed = True
-                    elif wrist.x > thumb.x and distance > 50:
+                    elif gestures["released"][hand]:
                         grabbed = False
 
                     if selected_axis is None and not scale and not rotate:
-                        if wrist.x < thumb.x:
-                            if selected_object_index < len(objects_data) - 3:
-                                if old_l_wrist_x is None:
-                                    old_l_wrist_x = wrist.x
-                                else:
-                                    wrist_x_diff = wrist.x - old_l_wrist_x
-                                    if wrist_x_diff > 0.25:
-                                        selected_object_index += 1
-                                        old_l_wrist_x = wrist.x
-                        elif wrist.x > thumb.x and selected_object_index > 0:
-                            if old_r_wrist_x is None:
-                                old_r_wrist_x = wrist.x
-                            else:
-                                wrist_x_diff = old_r_wrist_x - wrist.x
-                                if wrist_x_diff > 0.25:
-                                    selected_object_index -= 1
-                                    old_r_wrist_x = wrist.x
+                        selected_object_index += swipe_tracker.update(
+                            float(gestures["wrist_x"][hand]),
+                            left,
+                            right,
+                            selected_object_index < len(scene.furniture()) - 1,
+                            selected_object_index > 0,
+                        )
 
                         if grabbed and is_scissors and delete:
-                            if selected_object_index < len(objects_data) - 2:
-                                objects_data.pop(selected_object_index + 2)
+                            selected_object = scene.selected(selected_object_index)
+                            if selected_object is not None:
+                                scene.remove(selected_object["uid"])
                                 delete = False
                                 selected_object_index -= 1
 
+                    selected_object = scene.selected(selected_object_index)
                     if scale:
-                        if (
-                            grabbed
-                            and wrist.x < thumb.x
-                            and 0 <= selected_object_index < len(objects_data)
-                        ):
-                            selected_object = objects_data[selected_object_index + 2]
-
+                        if grabbed and left and selected_object is not None:
                             scale_size = round(distance / 10000, 4)
-
-                            if selected_axis == "x":
-                                selected_object["dimensions"][0] = scale_size
-                            elif selected_axis == "y":
-                                selected_object["dimensions"][1] = scale_size
-                            elif selected_axis == "z":
-                                selected_object["dimensions"][2] = scale_size
+                            if selected_axis in AXES:
+                                scene.set_component(
+                                    selected_object["uid"],
+                                    "dimensions",
+                                    AXES[selected_axis],
+                                    scale_size,
+                                )
                     elif rotate:
                         if grabbed:
-                            if wrist.x < thumb.x and 0 <= selected_object_index < len(
-                                objects_data
-                            ):
+                            if left and selected_object is not None:
 
                                 if thumb_x_last_position is None:
                                     thumb_x_last_position = thumb_x
@@ -470,188 +1348,218 @@ def start_server():
                                     thumb_x_diff = thumb_x_last_position - thumb_x
                                     if thumb_x_diff > 100 and not rotated:
                                         rotation_z = selected_object["rotation"][2]
-                                        if rotation_z + 90 <= 360:
-                                            selected_object["rotation"][2] += 90
-                                        else:
-                                            selected_object["rotation"][2] = 0
+                                        scene.set_component(
+                                            selected_object["uid"],
+                                            "rotation",
+                                            2,
+                                            (
+                                                rotation_z + 90
+                                                if rotation_z + 90 <= 360
+                                                else 0
+                                            ),
+                                        )
                                         rotated = True
                                     elif thumb_x > thumb_x_last_position:
                                         thumb_x_last_position = None
                         else:
                             rotated = False
 
-                    elif len(objects_data) > 2:
-                        if 0 <= selected_object_index < len(objects_data):
-                            selected_object = objects_data[selected_object_index + 2]
-                            if wrist.x > thumb.x and distance < 50:
-                                if (
-                                    "initial_thumb_x" not in selected_object
-                                    or "initial_thumb_y" not in selected_object
-                                    or selected_object["initial_thumb_x"] is None
-                                    or selected_object["initial_thumb_y"] is None
-                                ):
-                                    selected_object["initial_thumb_x"] = thumb.x
-                                    selected_object["initial_thumb_y"] = thumb.y
-
-                                delta_x = thumb.x - selected_object["initial_thumb_x"]
-                                delta_y = thumb.y - selected_object["initial_thumb_y"]
-
-                                if selected_axis == "x":
-                                    location_x = round(
-                                        selected_object["location"][0] + delta_x, 2
-                                    )
-
-                                    if "couch" in selected_object["uid"]:
-                                        if location_x > 6:
-                                            location_x = 6
-
-                                        if location_x < -6:
-                                            location_x = -6
-                                    elif "coffee-table" in selected_object["uid"]:
-                                        if location_x > 5.8:
-                                            location_x = 5.8
-
-                                        if location_x < -5.8:
-                                            location_x = -5.8
-                                    elif "playstation" in selected_object["uid"]:
-                                        if location_x > 7:
-                                            location_x = 7
-
-                                        if location_x < -7:
-                                            location_x = -7
-                                    elif "bed" in selected_object["uid"]:
-                                        if location_x > 7:
-                                            location_x = 7
-
-                                        if location_x < -3.5:
-                                            location_x = -3.5
-
-                                    selected_object["location"][0] = location_x
-                                elif selected_axis == "y":
-                                    location_y = round(
-                                        selected_object["location"][1] + delta_x, 2
-                                    )
-
-                                    if "couch" in selected_object["uid"]:
-                                        if location_y > 6:
-                                            location_y = 6
-
-                                        if location_y < -6:
-                                            location_y = -6
-                                    elif "coffee-table" in selected_object["uid"]:
-                                        if location_y > 5.8:
-                                            location_y = 5.8
-
-                                        if location_y < -5.8:
-                                            location_y = -5.8
-                                    elif "playstation" in selected_object["uid"]:
-                                        if location_y > 7:
-                                            location_y = 7
-
-                                        if location_y < -7:
-                                            location_y = -7
-                                    elif "bed" in selected_object["uid"]:
-                                        if location_y > -1:
-                                            location_y = -1
-
-                                        if location_y < -9:
-                                            location_y = -9
-
-                                    selected_object["location"][1] = location_y
-                                elif selected_axis == "z":
-                                    location_z = round(
-                                        selected_object["location"][2] - delta_y, 2
-                                    )
-                                    if location_z < 0.1:
-                                        location_z = 0.1
-
-                                    if location_z > 4:
-                                        location_z = 4
-
-                                    selected_object["location"][2] = location_z
-                            elif wrist.x > thumb.x and distance > 50:
-                                selected_object["initial_thumb_x"] = None
-                                selected_object["initial_thumb_y"] = None
+                    elif selected_object is not None:
+                        uid = selected_object["uid"]
+                        if right and distance < 50:
+                            if (
+                                selected_object.get("initial_thumb_x") is None
+                                or selected_object.get("initial_thumb_y") is None
+                            ):
+                                selected_object = scene.update(
+                                    uid,
+                                    initial_thumb_x=thumb_cmc_x,
+                                    initial_thumb_y=thumb_cmc_y,
+                                )
 
-            else:
-                old_l_wrist_x = None
-                old_r_wrist_x = None
+                            delta_x = thumb_cmc_x - selected_object["initial_thumb_x"]
+                            delta_y = thumb_cmc_y - selected_object["initial_thumb_y"]
 
-            frame_with_background = display_objects_grid(
-                frame_with_background, objects_data
-            )
+                            if selected_axis == "x":
+                                location_x = round(
+                                    selected_object["location"][0] + delta_x, 2
+                                )
 
-            cv2.imshow("Hand Detection", frame_with_background)
+                                if "couch" in selected_object["uid"]:
+                                    if location_x > 6:
+                                        location_x = 6
 
-            key = cv2.waitKey(1) & 0xFF
+                                    if location_x < -6:
+                                        location_x = -6
+                                elif "coffee-table" in selected_object["uid"]:
+                                    if location_x > 5.8:
+                                        location_x = 5.8
 
-            if key == ord("q"):
-                save_objects_data(objects_data)
-                break
-            elif key == ord("x"):
-                selected_axis = "x"
-            elif key == ord("y"):
-                selected_axis = "y"
-            elif key == ord("z"):
-                selected_axis = "z"
-            elif key == ord("c"):
-                selected_axis = None
-            elif key == ord("s"):
-                scale = not scale
-                rotate = False
-                delete = False
-            elif key == ord("r"):
-                rotate = not rotate
-                scale = False
-                delete = False
-            elif key == ord("d"):
-                rotate = False
-                scale = False
-                delete = not delete
-            elif key == ord("e"):
-                scale = False
-                rotate = False
-                delete = False
-                selected_axis = None
+                                    if location_x < -5.8:
+                                        location_x = -5.8
+                                elif "playstation" in selected_object["uid"]:
+                                    if location_x > 7:
+                                        location_x = 7
 
-        cap.release()
-        cv2.destroyAllWindows()
+                                    if location_x < -7:
+                                        location_x = -7
+                                elif "bed" in selected_object["uid"]:
+                                    if location_x > 7:
+                                        location_x = 7
 
-    def handle_client(conn, addr):
-        print(f"Conexão estabelecida com {addr}")
-        while True:
-            try:
-                data = conn.recv(1024)
-                if not data:
-                    print(f"Conexão encerrada por {addr}")
-                    break
-                message = json.loads(data.decode("utf-8"))
+                                    if location_x < -3.5:
+                                        location_x = -3.5
 
-                if message["action"] == "get_object":
-                    conn.sendall(json.dumps(objects_data).encode("utf-8"))
-            except Exception as e:
-                print(f"Erro com o cliente {addr}: {e}")
+                                scene.set_component(uid, "location", 0, location_x)
+                            elif selected_axis == "y":
+                                location_y = round(
+                                    selected_object["location"][1] + delta_x, 2
+                                )
+
+                                if "couch" in selected_object["uid"]:
+                                    if location_y > 6:
+                                        location_y = 6
+
+                                    if location_y < -6:
+                                        location_y = -6
+                                elif "coffee-table" in selected_object["uid"]:
+                                    if location_y > 5.8:
+                                        location_y = 5.8
+
+                                    if location_y < -5.8:
+                                        location_y = -5.8
+                                elif "playstation" in selected_object["uid"]:
+                                    if location_y > 7:
+                                        location_y = 7
+
+                                    if location_y < -7:
+                                        location_y = -7
+                                elif "bed" in selected_object["uid"]:
+                                    if location_y > -1:
+                                        location_y = -1
+
+                                    if location_y < -9:
+                                        location_y = -9
+
+                                scene.set_component(uid, "location", 1, location_y)
+                            elif selected_axis == "z":
+                                location_z = round(
+                                    selected_object["location"][2] - delta_y, 2
+                                )
+                                if location_z < 0.1:
+                                    location_z = 0.1
+
+                                if location_z > 4:
+                                    location_z = 4
+
+                                scene.set_component(uid, "location", 2, location_z)
+                        elif right and distance > 50:
+                            if (
+                                selected_object.get("initial_thumb_x") is not None
+                                or selected_object.get("initial_thumb_y") is not None
+                            ):
+                                scene.update(
+                                    uid, initial_thumb_x=None, initial_thumb_y=None
+                                )
+
+            else:
+                swipe_tracker.reset()
+            profiler.lap("gestures")
+
+            scene_history.publish(scene)
+            profiler.lap("publish")
+
+            if not headless or preview is not None:
+                frame_with_background = compositor.compose(
+                    (
+                        scene_history.layout_version,
+                        selected_object_index,
+                        sprite_cache.refresh(),
+                    ),
+                    scene,
+                )
+                draw_hands(frame_with_background, gestures["pixels"])
+                if preview is not None:
+                    preview.offer(frame_with_background, time.monotonic())
+                profiler.lap("display_objects_grid")
+
+            commands = []
+            if not headless:
+                cv2.imshow("Hand Detection", frame_with_background)
+
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord("q"):
+                    commands.append("quit")
+                elif key != 0xFF:
+                    commands.append(chr(key))
+                profiler.lap("imshow")
+
+            while not scene_server.commands.empty():
+                commands.append(scene_server.commands.get_nowait())
+
+            if "quit" in commands:
                 break
-        try:
-            conn.close()
-        except OSError:
-            print(f"Erro ao tentar fechar a conexão com {addr}")
+            for command in commands:
+                if command == "save":
+                    if journal is not None:
+                        journal.compact()
+                else:
+                    apply_mode_key(command)
 
-    def accept_connections():
-        while True:
-            try:
-                conn, addr = server_socket.accept()
-                threading.Thread(
-                    target=handle_client, args=(conn, addr), daemon=True
-                ).start()
-            except OSError:
-                print("Erro ao aceitar novas conexões.")
+            frame_buffers.end_frame()
+            profiler.end_frame()
+            scheduler.end_frame(time.monotonic() - frame_start)
+
+            frames += 1
+            clock.tick()
+            if max_frames is not None and frames >= max_frames:
                 break
 
-    threading.Thread(target=accept_connections, daemon=True).start()
-    object_detection_and_hand_detection()
+        grabber.stop()
+        if preview is not None:
+            preview.stop()
+        pipeline.shutdown()
+        if detector is not None:
+            detector.close()
+        if head_pose_estimator is not None:
+            head_pose_estimator.close()
+        if journal is not None:
+            journal.close()
+        capture_stats = grabber.stats()
+        print(
+            f"Frames capturados: {capture_stats['captured']}, "
+            f"descartados: {capture_stats['dropped']}"
+        )
+        cap.release()
+        if not headless:
+            cv2.destroyAllWindows()
+
+        return {
+            "frames": frames,
+            "capture": capture_stats,
+            "profile": profiler.snapshot(),
+            "schedule": scheduler.snapshot(),
+            "scene_version": scene_history.version,
+            "objects": scene.to_list(),
+        }
+
+    if serve:
+        scene_server.start()
+    summary = object_detection_and_hand_detection()
     print("Servidor está rodando. Pressione 'Q' para parar.")
+    return summary
 
 
 if __name__ == "__main__":
-    start_server()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--headless", action="store_true", default=HEADLESS)
+    parser.add_argument("--preview-port", type=int, default=PREVIEW_PORT)
+    parser.add_argument("--profile", action="store_true", default=PROFILE_STAGES)
+    parser.add_argument("--profile-dump", default=PROFILE_DUMP_PATH)
+    args = parser.parse_args()
+    start_server(
+        headless=args.headless,
+        preview_port=args.preview_port,
+        profile=args.profile,
+        profile_dump=args.profile_dump,
+    )